@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sys
+
+import pygame
+
+# Packs scaled image variants into an atlas PNG plus a JSON manifest of
+# rects, one atlas per named page. Each atlas is named after a digest of
+# its sources and the requested sizes, so editing any PNG or size rebuilds it.
+#
+# An image spec is (stem, (w, h), smooth): the file <stem>.png under the
+# images dir, scaled to (w, h) with smoothscale if smooth else scale.
+#
+# Run "python assets.py" before packaging to prebuild the atlas.
+
+ATLAS_WIDTH = 2048
+
+
+def spec_key(spec):
+    stem, (w, h), smooth = spec
+    return f"{stem}@{w}x{h}{'s' if smooth else ''}"
+
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _digest(specs, sources):
+    h = hashlib.sha1()
+    for spec in sorted(set(specs)):
+        h.update(spec_key(spec).encode())
+    for stem in sorted(sources):
+        h.update(f"{stem}:{sources[stem]['sha1']}".encode())
+    return h.hexdigest()[:16]
+
+
+def _pack(sizes, width):
+    # shelf packing, tallest first; returns {key: (x, y)} and total height
+    pos = {}
+    x = y = shelf = 0
+    for key, (w, h) in sorted(sizes.items(), key=lambda kv: -kv[1][1]):
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        pos[key] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return pos, y + shelf
+
+
+class AssetCache:
+
+    def __init__(self, images_dir, specs, cache_dir, name="atlas"):
+        self.images_dir = images_dir
+        self.cache_dir  = cache_dir
+        self.name       = name
+        self.specs      = list(dict.fromkeys(specs))
+        self.images     = {}       # spec -> Surface (subsurface of the atlas)
+        self.built      = False    # True if this run had to rebuild
+
+    def _source(self, stem):
+        return os.path.join(self.images_dir, f"{stem}.png")
+
+    def _hash_sources(self, previous):
+        # reuse the recorded hash while size and mtime still match; a source
+        # that isn't shipped (web builds carry only the atlas) keeps its entry
+        sources = {}
+        for stem in sorted({s[0] for s in self.specs}):
+            path = self._source(stem)
+            old = previous.get(stem)
+            if not os.path.exists(path):
+                if old:
+                    sources[stem] = old
+                continue
+            stat = _stat(path)
+            if old and old.get("stat") == stat:
+                sources[stem] = old
+            else:
+                sources[stem] = {"sha1": _file_sha1(path), "stat": stat}
+        return sources
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, f"{self.name}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self):
+        manifest = self._read_manifest() or {}
+        if manifest and sys.platform == "emscripten":
+            # the web build ships the atlas made by the packaging step;
+            # trust it instead of re-reading every source through the fetch layer
+            sources = manifest.get("sources", {})
+        else:
+            sources = self._hash_sources(manifest.get("sources", {}))
+        digest   = _digest(self.specs, sources)
+        if manifest.get("digest") == digest:
+            try:
+                atlas = pygame.image.load(
+                    os.path.join(self.cache_dir, manifest["atlas"])).convert_alpha()
+                for spec in self.specs:
+                    rect = manifest["rects"].get(spec_key(spec))
+                    if rect:
+                        self.images[spec] = atlas.subsurface(rect)
+                return self.images
+            except (OSError, pygame.error, KeyError, ValueError):
+                self.images.clear()
+        self.build(sources, digest)
+        return self.images
+
+    def build(self, sources=None, digest=None):
+        # load and scale each source once, then pack the results
+        if sources is None:
+            sources = self._hash_sources({})
+            digest  = _digest(self.specs, sources)
+        raws, scaled = {}, {}
+        for spec in self.specs:
+            stem, size, smooth = spec
+            path = self._source(stem)
+            if not os.path.exists(path):
+                continue
+            if stem not in raws:
+                raws[stem] = pygame.image.load(path).convert_alpha()
+            fn = pygame.transform.smoothscale if smooth else pygame.transform.scale
+            scaled[spec] = fn(raws[stem], size)
+
+        width = max([ATLAS_WIDTH] + [s.get_width() for s in scaled.values()])
+        pos, height = _pack({k: s.get_size() for k, s in scaled.items()}, width)
+        atlas = pygame.Surface((width, max(1, height)), pygame.SRCALPHA)
+        rects = {}
+        for spec, surf in scaled.items():
+            atlas.blit(surf, pos[spec])
+            rects[spec_key(spec)] = [*pos[spec], *surf.get_size()]
+            self.images[spec] = atlas.subsurface((pos[spec], surf.get_size()))
+        self.built = True
+
+        # a read-only install still runs, it just rebuilds next launch
+        name = f"{self.name}-{digest}.png"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for old in os.listdir(self.cache_dir):
+                if old.startswith(f"{self.name}-") and old != name:
+                    os.remove(os.path.join(self.cache_dir, old))
+            pygame.image.save(atlas, os.path.join(self.cache_dir, name))
+            with open(os.path.join(self.cache_dir, f"{self.name}.json"), "w") as f:
+                json.dump({"digest": digest, "atlas": name, "sources": sources,
+                           "rects": rects}, f, indent=1)
+        except (OSError, pygame.error):
+            pass
+        return self.images
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import main
+    pygame.display.set_mode((1, 1))
+    game_dir = os.path.dirname(os.path.abspath(main.__file__))
+    for name, specs in main.image_pages().items():
+        cache = AssetCache(os.path.join(game_dir, "assets", "images"), specs,
+                           os.path.join(game_dir, "assets", "atlas"), name=name)
+        if "--force" in sys.argv:
+            cache.build()
+        else:
+            cache.load()
+        print(f"{name}: {'rebuilt' if cache.built else 'up to date'}",
+              f"({len(cache.images)} images)")
@@ -0,0 +1,254 @@
+# Headless benchmarks for the hot paths of the game.
+#
+#   python bench.py                      # writes bench_results.json
+#   python bench.py --out before.json
+#   python bench.py --compare before.json
+#
+# Every case runs against the same seeded world in SDL's dummy video driver,
+# so results from two commits can be compared directly.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+from controls import ScriptedInput
+from mining import Blast, run_blasts
+
+SEED = 1234
+
+
+def timeit(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "n":       len(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p95_ms":  samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_ms":  samples[0],
+        "max_ms":  samples[-1],
+    }
+
+
+def new_game(load_assets=True):
+    game = main.digging(seed=SEED, headless=True)
+    if load_assets:
+        asyncio.run(game.load_assets())
+    return game
+
+
+def surface_pos(game, x=400):
+    return pygame.math.Vector2(x, game.find_ground_y(x))
+
+
+def bench_startup(repeat):
+    # time until the first frame can be drawn, and until every asset is in
+    n = max(1, repeat // 20)
+    return {
+        "startup":      timeit(lambda: new_game(load_assets=False), n),
+        "startup.full": timeit(new_game, n),
+    }
+
+
+def bench_worldgen(repeat):
+    g = new_game()
+    gen = g.worldgen
+    return {
+        "worldgen.rows_10k": timeit(lambda: gen.rows(0, 10000), repeat),
+        "worldgen.chunk":    timeit(lambda: gen.rows(0, main.CHUNK_ROWS), repeat),
+    }
+
+
+def bench_draw(repeat):
+    g = new_game()
+    out = {}
+    for depth in (0, 40, 400):
+        cam = main.SKY_HEIGHT + depth * main.BLOCK_SIZE - main.SCREEN_HEIGHT // 2
+        g.draw_world(cam)
+        out[f"draw_world.depth{depth}"] = timeit(lambda: g.draw_world(cam), repeat)
+    cam = main.SKY_HEIGHT + 40 * main.BLOCK_SIZE - main.SCREEN_HEIGHT // 2
+    out["draw_world.cold"] = timeit(
+        lambda: g.draw_world(cam), max(1, repeat // 10),
+        setup=lambda: (g.terrain.strips.clear(), g.terrain.dirty.clear()))
+
+    pos = pygame.math.Vector2(400, main.SKY_HEIGHT + 10 * main.BLOCK_SIZE)
+    cam = int(pos.y - main.SCREEN_HEIGHT // 2)
+    out["draw_fog"] = timeit(lambda: g.draw_fog(pos, cam), repeat)
+
+    # radar overlay deep in the ore layers, where most blocks are marked
+    g.active_tool = "radar"
+    deep = pygame.math.Vector2(400, main.SKY_HEIGHT + 30 * main.BLOCK_SIZE)
+    deep_cam = int(deep.y - main.SCREEN_HEIGHT // 2)
+    out["draw_radar"] = timeit(lambda: g.draw_radar(deep, deep_cam), repeat)
+    g.active_tool = "fists"
+
+    # the whole world pass (terrain, fog, upscale) at each render scale
+    def world_pass():
+        g.draw_world(cam)
+        g.draw_fog(pos, cam)
+        g.upscale_world()
+    for scale in g.scaler.scales:
+        g.set_render_scale(scale)
+        world_pass()
+        out[f"world_pass.scale{round(scale * 100)}"] = timeit(world_pass, repeat)
+    g.set_render_scale(1.0)
+
+    out["draw_hud"] = timeit(lambda: g.draw_hud(0.0), repeat)
+    out["draw_hud.rebuild"] = timeit(
+        lambda: g.draw_hud(0.0), repeat,
+        setup=lambda: setattr(g, "_hud_built_for", None))
+
+    g.enter_shop(None, 0.0)
+    for tab in ("sell", "upgrades", "tools", "skins"):
+        g.shop.tab = tab
+        out[f"shop.{tab}.rebuild"] = timeit(
+            lambda: g.shop.draw(g.screen, 0.0), max(1, repeat // 5),
+            setup=g.shop.invalidate)
+    out["shop.idle"] = timeit(lambda: g.shop.draw(g.screen, 0.0), repeat)
+    return out
+
+
+def bench_sim(repeat):
+    g = new_game()
+    out = {}
+    pos = surface_pos(g)
+    state = {"pos": pos, "vvel": 0.0}
+
+    def walk():
+        p, v, _ = g.physics_step(state["pos"], state["vvel"], 300)
+        state["pos"], state["vvel"] = p, v
+    out["physics_step.walk"] = timeit(walk, repeat)
+
+    def fall():
+        p = pygame.math.Vector2(400, main.SKY_HEIGHT - 400)
+        g.physics_step(p, 3000.0, 0)
+    out["physics_step.fall"] = timeit(fall, repeat)
+
+    # mine straight down a column, one hit at a time
+    state["row"] = 1
+
+    def mine_hit():
+        by = main.SKY_HEIGHT + state["row"] * main.BLOCK_SIZE + 1
+        g.do_mine((400, by), pos, 0.0, True)
+        if not g.world.solid(state["row"], 3):
+            state["row"] += 1
+    out["do_mine.hit"] = timeit(mine_hit, repeat)
+
+    def blast():
+        g.owned_tools["dynamite"] = 1
+        g.dynamite_count = 2
+        g.active_tool = "dynamite"
+        row = state["row"] + 2
+        state["row"] = row + 2
+        g.do_mine((640, main.SKY_HEIGHT + row * main.BLOCK_SIZE + 1),
+                  pos, 0.0, True)
+    out["do_mine.dynamite"] = timeit(blast, max(1, repeat // 5))
+
+    # radius 10 blasts into fresh rock, each one further down
+    for shape in ("square", "circle"):
+        def area():
+            row = state["row"] + 12
+            state["row"] = row + 12
+            g.mine_area(Blast(row, 5, shape, 10, 999), bulk=True)
+        out[f"mine_area.{shape}10"] = timeit(area, max(1, repeat // 5))
+
+    # diamonds set off small blasts of their own, up to the chain limit
+    chains = {"diamond": ("circle", 2, 999)}
+    def chain():
+        row = state["row"] + 12
+        state["row"] = row + 12
+        run_blasts(g.world, [Blast(row, 5, "circle", 3, 999)], chains)
+    out["run_blasts.chain"] = timeit(chain, max(1, repeat // 5))
+    return out
+
+
+def bench_loop(frames):
+    # a short scripted session: step over one column, dig down, then walk
+    # and jump around the shaft
+    K = pygame
+    steps = [(12, {K.K_a}, ())]
+    steps += [(6, {K.K_DOWN}, (K.K_e,))] * 40
+    steps += [(40, {K.K_d}, ()), (40, {K.K_a, K.K_SPACE}, ())]
+    script = ScriptedInput.from_steps(steps)
+    g = main.digging(seed=SEED, headless=True, input_source=script)
+    t0 = time.perf_counter()
+    asyncio.run(g.main(frames=frames, fixed_dt=1 / 60))
+    total = (time.perf_counter() - t0) * 1000
+    return {"main_loop": {"n": frames, "mean_ms": total / frames,
+                          "total_ms": total}}
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(current, path):
+    with open(path) as f:
+        old = json.load(f)["results"]
+    print(f"\n{'case':28} {'before':>10} {'after':>10} {'change':>8}")
+    for name, res in current.items():
+        if name not in old:
+            continue
+        a, b = old[name]["mean_ms"], res["mean_ms"]
+        change = (b - a) / a * 100 if a else 0.0
+        print(f"{name:28} {a:10.3f} {b:10.3f} {change:+7.1f}%")
+
+
+def run(argv=None):
+    ap = argparse.ArgumentParser(description="Headless game benchmarks")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--frames", type=int, default=600)
+    ap.add_argument("--compare", metavar="JSON")
+    args = ap.parse_args(argv)
+
+    results = {}
+    results.update(bench_startup(args.repeat))
+    results.update(bench_worldgen(args.repeat))
+    results.update(bench_draw(args.repeat))
+    results.update(bench_sim(args.repeat))
+    results.update(bench_loop(args.frames))
+
+    for name, res in results.items():
+        print(f"{name:28} mean {res['mean_ms']:8.3f} ms")
+
+    report = {
+        "commit":  git_rev(),
+        "python":  platform.python_version(),
+        "pygame":  pygame.version.ver,
+        "seed":    SEED,
+        "repeat":  args.repeat,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
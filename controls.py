@@ -0,0 +1,66 @@
+import pygame
+
+# Input sources hand the game loop one (keys, events) pair per frame.
+# keys supports keys[pygame.K_x] like pygame.key.get_pressed(). After each
+# poll the loop passes its frame time through frame_dt(), which lets a
+# replay substitute the recorded one.
+
+
+class LiveInput:
+    # viewport, if given, maps mouse positions from window to screen pixels
+
+    def __init__(self, viewport=None):
+        self.viewport = viewport
+
+    def poll(self):
+        events = pygame.event.get()
+        if self.viewport:
+            events = self.viewport.map_events(events)
+        return pygame.key.get_pressed(), events
+
+    def frame_dt(self, dt):
+        return dt
+
+
+class HeldKeys:
+    __slots__ = ("held",)
+
+    def __init__(self, held=()):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ScriptedInput:
+    # Plays back a fixed list of frames, each (held_keys, events), for
+    # headless runs. Once the script runs out it reports no input.
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.frame = 0
+
+    @classmethod
+    def from_steps(cls, steps):
+        # steps: (frame_count, held_keys, keys_pressed_on_first_frame)
+        frames = []
+        for count, held, pressed in steps:
+            for i in range(count):
+                events = [pygame.event.Event(pygame.KEYDOWN, key=k)
+                          for k in pressed] if i == 0 else []
+                frames.append((HeldKeys(held), events))
+        return cls(frames)
+
+    @property
+    def done(self):
+        return self.frame >= len(self.frames)
+
+    def poll(self):
+        if self.done:
+            return HeldKeys(), []
+        keys, events = self.frames[self.frame]
+        self.frame += 1
+        return keys, list(events)
+
+    def frame_dt(self, dt):
+        return dt
@@ -1,9 +1,24 @@
 import asyncio
+import math
 import pygame
-import sys
 import os
 import random
-from player import movement
+import time
+import physics
+from assets import AssetCache
+from controls import LiveInput
+from mining import Blast, BlockBroken, ToolStats, run_blasts
+from pacing import FrameScheduler, ResolutionScaler
+from player import movement, player_tile
+from profiler import FrameProfiler
+from radar import OreIndex
+from render import (FogLayer, SpriteRegistry, TerrainCache, TextCache,
+                    Viewport, build_damage_atlas, draw_rounded_rect)
+from save import SaveError, SaveFile, default_store
+from shop import ShopScreen
+from state import VersionedDict
+from world import World
+from worldgen import WorldGen
 
 SCREEN_WIDTH  = 1280
 SCREEN_HEIGHT = 720
@@ -11,15 +26,44 @@ SKY_HEIGHT    = 500
 BLOCK_SIZE    = 128
 
 GRID_COLS = SCREEN_WIDTH // BLOCK_SIZE + 1
-GRID_ROWS = 40
+# the world is unbounded downwards and generated CHUNK_ROWS rows at a time;
+# fossils are still buried within the first FOSSIL_ROWS rows
+CHUNK_ROWS  = 16
+FOSSIL_ROWS = 40
 
 PLAYER_WIDTH  = 85
 PLAYER_HEIGHT = 100
 
+# height of the bottom strip the HUD panel is composed into
+HUD_BAND = 128
+
 # values used by the movement helper (formerly defined in player.py)
 GRAVITY = 1200
 JUMP_FORCE = -600
 
+# the simulation always advances in PHYSICS_DT ticks; a slow frame runs
+# several ticks, and anything past MAX_PHYSICS_STEPS is dropped
+PHYSICS_DT        = 1 / 120
+MAX_PHYSICS_STEPS = 8
+
+# frame pacing: static screens (fossil, an untouched shop) drop to IDLE_FPS
+# until input arrives
+TARGET_FPS = 60
+IDLE_FPS   = 4
+
+# live play renders the world below full resolution while frames take longer
+# than this to build, and scales it up again once there is room
+RENDER_BUDGET = 0.8 / TARGET_FPS
+
+# frame profiler overlay (off until toggled)
+PROFILER_KEY       = pygame.K_F3
+PROFILER_DUMP_KEY  = pygame.K_F4
+PROFILER_DUMP_PATH = "profile.csv"
+
+# progress is written this often (only what changed since the last save)
+AUTOSAVE_SECONDS = 15
+SAVE_PATH        = "savegame.dips"
+
 WORLD_LEFT  = 0
 WORLD_RIGHT = SCREEN_WIDTH - PLAYER_WIDTH
 
@@ -60,6 +104,11 @@ BLOCK_HP = {
 }
 for _fp in FOSSIL_PIECES:
     BLOCK_HP[_fp] = 16
+FOSSIL_SET = frozenset(FOSSIL_PIECES)
+
+# block name -> (shape, radius, damage) of the blast it sets off when a blast
+# breaks it; see mining.run_blasts
+BLAST_CHAINS = {}
 
 DEPTH_LAYERS = [
     (1,   [("grass",  100)]),
@@ -86,18 +135,18 @@ TOOL_DEFS = {
     },
     "dynamite": {
         "label": "Dynamite", "base_durability": 1, "damage": 999,
-        "fortune_mult": 1.0, "mine_radius": 1, "price": 25,
-        "description": "One-use. Destroys 3x3 area.",
+        "fortune_mult": 1.0, "mine_radius": 1, "mine_shape": "square",
+        "price": 25, "description": "One-use. Destroys 3x3 area.",
     },
     "radar": {
         "label": "Radar", "base_durability": 999999, "damage": 1,
         "fortune_mult": 1.0, "mine_radius": 0, "price": 80,
-        "description": "Reveals blocks around you. (placeholder)",
+        "description": "Shows ore and fossils around you.",
     },
     "drill": {
         "label": "Drill", "base_durability": 50, "damage": 4,
-        "fortune_mult": 1.5, "mine_radius": 0, "price": 150,
-        "description": "High damage, mines more, faster.",
+        "fortune_mult": 1.5, "mine_radius": 2, "mine_shape": "line",
+        "price": 150, "description": "High damage, bores 3 blocks deep.",
     },
 }
 
@@ -122,65 +171,197 @@ PICKAXE_UPGRADES = {
     },
 }
 
-pygame.init()
-
-
-def pick_block_type(row):
-    for max_row, choices in DEPTH_LAYERS:
-        if row < max_row:
-            return random.choices(
-                [c[0] for c in choices],
-                weights=[c[1] for c in choices], k=1)[0]
-    return "stone"
-
+# radar: ore within RADAR_RANGE blocks is outlined through the fog, and the
+# readout points at the nearest of each target up to RADAR_SCAN blocks away
+RADAR_RANGE   = 8
+RADAR_SCAN    = 64
+RADAR_COLORS  = {"copper": (230,140,70), "gold": (255,215,0),
+                 "diamond": (90,220,255), "ruby": (255,60,90),
+                 **{fp: (240,230,200) for fp in FOSSIL_PIECES}}
+RADAR_TARGETS = [("Diamond", ["diamond"]), ("Ruby", ["ruby"]),
+                 ("Fossil", FOSSIL_PIECES)]
+
+# sizes every image is scaled to; image_pages() lists each variant that
+# goes into the asset atlases (see assets.py)
+PLAYER_SIZE    = (PLAYER_WIDTH, PLAYER_HEIGHT)
+SKY_SIZE       = (SCREEN_WIDTH, SKY_HEIGHT)
+BLOCK_DIMS     = (BLOCK_SIZE, BLOCK_SIZE)
+HUD_ICON_SIZE  = (32, 32)
+SHOP_ICON_SIZE = (48, 48)
+TOOL_IMAGES    = ["pickaxe", "dynamite", "radar", "drill"]
+CORE_ORES      = ["grass", "soil", "stone"]   # the layers around the spawn
+
+
+def image_pages():
+    # "core" holds what the first frame needs; "extra" streams in after it
+    core = [
+        ("dip_playerv2",   PLAYER_SIZE, False),
+        ("dip_background", SKY_SIZE,    False),
+    ]
+    core += [(f"dip_{ore}", BLOCK_DIMS, False) for ore in CORE_ORES]
+    extra = [("dip_player_santa", PLAYER_SIZE, True)]
+    for ore in ORE_TYPES:
+        if ore not in CORE_ORES:
+            extra.append((f"dip_{ore}", BLOCK_DIMS, False))
+        if ore != "grass":
+            extra.append((f"dip_{ore}", HUD_ICON_SIZE, False))
+            extra.append((f"dip_{ore}", SHOP_ICON_SIZE, False))
+    extra += [(f"dip_{tool}", SHOP_ICON_SIZE, False) for tool in TOOL_IMAGES]
+    extra += [(FOSSIL_ASSET[fp], BLOCK_DIMS, False) for fp in FOSSIL_PIECES]
+    return {"core": core, "extra": extra}
 
-def draw_rounded_rect(surface, color, rect, radius=10,
-                      border_color=None, border_width=2):
-    pygame.draw.rect(surface, color, rect, border_radius=radius)
-    if border_color:
-        pygame.draw.rect(surface, border_color, rect, border_width,
-                         border_radius=radius)
 
-
-class Block:
-    def __init__(self, x, y, block_type):
-        self.x, self.y = x, y
-        self.block_type = block_type
-        self.max_hp = BLOCK_HP.get(block_type, 1)
-        self.hp     = self.max_hp
+pygame.init()
 
 
 class digging:
 
-    def __init__(self):
-        self.screen = pygame.display.set_mode(
-            (SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    def __init__(self, seed=None, headless=False, input_source=None,
+                 save_store=None):
+        # headless runs (benchmarks, replays) render into SDL's dummy
+        # video driver and take their input from a script
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            pygame.display.quit()
+            pygame.display.init()
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+        # everything draws to self.screen in SCREEN_WIDTH x SCREEN_HEIGHT
+        # pixels; the viewport fits that to whatever size the window is
+        self.viewport = Viewport((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = self.viewport.canvas
+        self.input = input_source or LiveInput(self.viewport)
         # track facing direction instead of relying on a module global
         self.facing = 1  # 1=right, -1=left
         pygame.display.set_caption("Digging In Paris")
         self.clock = pygame.time.Clock()
-        assets_dir = os.path.join(os.path.dirname(__file__), "assets", "images")
+        self.scheduler = FrameScheduler(self.clock, TARGET_FPS, IDLE_FPS)
+        game_dir   = os.path.dirname(__file__)
+        self.assets_dir = os.path.join(game_dir, "assets")
+
+        # only the core atlas is loaded before the first frame; load_assets()
+        # brings in the rest, and until then flat placeholders stand in
+        self.atlas_pages = {
+            name: AssetCache(os.path.join(self.assets_dir, "images"), specs,
+                             os.path.join(self.assets_dir, "atlas"), name=name)
+            for name, specs in image_pages().items()
+        }
+        self.images = dict(self.atlas_pages["core"].load())
+        self.assets_ready   = False
+        self.fullfossil_img = None
+        self._asset_task    = None
+
+        self.owned_skins   = set()
+        self.equipped_skin = None
+        self.sprites       = SpriteRegistry()
+        self._apply_images()
+
+        # a save, when there is one, decides the seed
+        self.saves = SaveFile(save_store) if save_store else None
+        snapshot = None
+        if self.saves:
+            try:
+                snapshot = self.saves.load()
+            except SaveError:
+                snapshot = None
+        if snapshot:
+            seed = snapshot.seed
+
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        # gameplay rolls come from here, never the global random, so a
+        # seed plus the input log reproduces a run exactly
+        self.rng  = random.Random(self.seed)
+        self.world = World(GRID_COLS, BLOCK_HP, BLOCK_SIZE, SKY_HEIGHT,
+                           self.generate_chunk, chunk_rows=CHUNK_ROWS)
+        self.worldgen = WorldGen(GRID_COLS, self.world.ids, DEPTH_LAYERS,
+                                 FOSSIL_PIECES, self.seed, fossil_rows=FOSSIL_ROWS)
+        self.ores = OreIndex(self.world, RADAR_COLORS)
+        self._radar_rings     = {}
+        self._radar_panel     = None
+        self._radar_built_for = None
+        if snapshot:
+            try:
+                snapshot.apply(self.world)
+            except SaveError:
+                snapshot = None
+        # tile id -> image, so the draw loop never touches block names
+        self.tile_imgs = [self.block_imgs.get(n) for n in self.world.names]
+        self.terrain   = TerrainCache(self.world, self.tile_imgs,
+                                      build_damage_atlas(BLOCK_SIZE))
+        self.fog       = FogLayer()
+        # the world pass (sky, terrain, fog) draws at render_scale into its
+        # own target, upscaled onto the screen before sprites and the HUD
+        self.render_scale  = 1.0
+        self.scaler        = ResolutionScaler(RENDER_BUDGET)
+        self._world_target = None
+        self._sky_scaled   = None   # (scale, source sky, scaled sky)
+
+        self.fossil_collected = VersionedDict({fp: False for fp in FOSSIL_PIECES})
+        self.fossils_found    = 0
+        self.blocks_mined     = VersionedDict()   # block name -> count
+
+        self.inventory = VersionedDict({ore: 0 for ore in ORE_TYPES if ore != "grass"})
+        self.coins     = 10000
+
+        self.active_tool      = "fists"
+        self.owned_tools: dict[str, int] = VersionedDict({"fists": 999999})
+        self.dynamite_count   = 0
+        self.pickaxe_upgrades = VersionedDict({k: 0 for k in PICKAXE_UPGRADES})
+        self._tool_stats      = None
+        self.fossil_complete  = False
+
+        self.font       = pygame.font.SysFont(None, 26)
+        self.font_med   = pygame.font.SysFont(None, 32)
+        self.font_large = pygame.font.SysFont(None, 42)
+        self.font_title = pygame.font.SysFont(None, 72)
+        self.text       = TextCache()
+        self.profiler   = FrameProfiler()
+
+        self.state = "game"
+        self.shop  = ShopScreen(self, (SCREEN_WIDTH, SCREEN_HEIGHT),
+                                ORE_PRICES, TOOL_DEFS, PICKAXE_UPGRADES)
+
+        self._flash_msg = ""
+        self._flash_ttl = 0.0
+        self._flash_surf      = None
+        self._flash_built_for = None
+
+        # every broken block is announced here as a BlockBroken, in order
+        self.on_block_broken = [self._collect_ore, self._collect_fossil,
+                                self._wear_tool, self._count_block]
+
+        self.spawn_pos      = None
+        self._autosave_time = 0.0
+        if snapshot and snapshot.state:
+            self._load_state(snapshot.state)
+
+        self._hud_built_for = None
+        self._hud_band      = None
+        self._hud_band_pos  = (0, 0)
+        self._hud_corner    = None
+
+    def _apply_images(self):
+        # (re)point every image attribute at what has been loaded so far
+        images = self.images
+
+        def image(stem, size, fallback=None, smooth=False, flags=0):
+            img = images.get((stem, size, smooth))
+            if img is None and fallback is not None:
+                img = pygame.Surface(size, flags)
+                img.fill(fallback)
+            return img
 
         # Default player skin
-        raw = pygame.image.load(
-            os.path.join(assets_dir, "dip_playerv2.png")).convert_alpha()
-        self.player_img_default = pygame.transform.scale(raw, (PLAYER_WIDTH, PLAYER_HEIGHT))
+        self.player_img_default = images[("dip_playerv2", PLAYER_SIZE, False)]
 
         # Santa skin
-        santa_path = os.path.join(assets_dir, "dip_player_santa.png")
-        if os.path.exists(santa_path):
-            raw = pygame.image.load(santa_path).convert_alpha()
-            self.player_img_santa = pygame.transform.smoothscale(raw, (PLAYER_WIDTH, PLAYER_HEIGHT))
-        else:
-            self.player_img_santa = None
+        self.player_img_santa = image("dip_player_santa", PLAYER_SIZE, smooth=True)
 
-        self.player_img    = self.player_img_default
-        self.owned_skins   = set()
-        self.equipped_skin = None
+        self.sprites.register("default", [self.player_img_default])
+        if self.player_img_santa:
+            self.sprites.register("santa", [self.player_img_santa])
 
-        raw = pygame.image.load(
-            os.path.join(assets_dir, "dip_background.png")).convert()
-        self.background_sky = pygame.transform.scale(raw, (SCREEN_WIDTH, SKY_HEIGHT))
+        self.background_sky = images[("dip_background", SKY_SIZE, False)].convert()
         self.sky_extend_color = self.background_sky.get_at((SCREEN_WIDTH // 2, 4))[:3]
 
         fallback_colors = {
@@ -192,118 +373,141 @@ class digging:
         self.hud_icons   = {}
         self.shop_icons  = {}
         for ore in ORE_TYPES:
-            path = os.path.join(assets_dir, f"dip_{ore}.png")
-            if os.path.exists(path):
-                raw = pygame.image.load(path).convert_alpha()
-            else:
-                raw = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE))
-                raw.fill(fallback_colors.get(ore, (200,200,200)))
-            self.block_imgs[ore]  = pygame.transform.scale(raw, (BLOCK_SIZE, BLOCK_SIZE))
+            color = fallback_colors.get(ore, (200,200,200))
+            self.block_imgs[ore] = image(f"dip_{ore}", BLOCK_DIMS, color)
             if ore != "grass":
-                self.hud_icons[ore]  = pygame.transform.scale(raw, (32, 32))
-                self.shop_icons[ore] = pygame.transform.scale(raw, (48, 48))
+                self.hud_icons[ore]  = image(f"dip_{ore}", HUD_ICON_SIZE, color)
+                self.shop_icons[ore] = image(f"dip_{ore}", SHOP_ICON_SIZE, color)
 
         tool_fallbacks = {
             "pickaxe": (160,100,40), "dynamite": (220,60,60),
             "radar":   (60,160,220), "drill":    (80,80,200),
         }
         self.tool_imgs = {}
-        for tool in ["pickaxe","dynamite","radar","drill"]:
-            path = os.path.join(assets_dir, f"dip_{tool}.png")
-            if os.path.exists(path):
-                raw = pygame.image.load(path).convert_alpha()
-            else:
-                raw = pygame.Surface((48, 48), pygame.SRCALPHA)
-                raw.fill(tool_fallbacks[tool])
-            self.tool_imgs[tool] = pygame.transform.scale(raw, (48, 48))
+        for tool in TOOL_IMAGES:
+            self.tool_imgs[tool] = image(f"dip_{tool}", SHOP_ICON_SIZE,
+                                         tool_fallbacks[tool], flags=pygame.SRCALPHA)
 
         # Fossil block images
         self.fossil_imgs = {}
         for fp in FOSSIL_PIECES:
-            stem = FOSSIL_ASSET[fp]
-            path = os.path.join(assets_dir, f"{stem}.png")
-            if os.path.exists(path):
-                raw = pygame.image.load(path).convert_alpha()
-            else:
-                raw = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE))
-                raw.fill((180, 170, 150))
-            self.fossil_imgs[fp] = pygame.transform.scale(raw, (BLOCK_SIZE, BLOCK_SIZE))
+            self.fossil_imgs[fp] = image(FOSSIL_ASSET[fp], BLOCK_DIMS, (180, 170, 150))
             self.block_imgs[fp]  = self.fossil_imgs[fp]
 
-        # Full fossil completion image
-        full_path = os.path.join(assets_dir, "dip_fullfossil.png")
-        if os.path.exists(full_path):
-            raw = pygame.image.load(full_path).convert_alpha()
-            fw, fh = raw.get_size()
-            scale = min((SCREEN_WIDTH - 200) / fw, (SCREEN_HEIGHT - 200) / fh)
-            self.fullfossil_img = pygame.transform.scale(
-                raw, (int(fw * scale), int(fh * scale)))
-        else:
-            self.fullfossil_img = None
-
-        self.grid = []
-        for r in range(GRID_ROWS):
-            row_list = []
-            for c in range(GRID_COLS):
-                bt = "grass" if r == 0 else pick_block_type(r)
-                row_list.append(Block(c * BLOCK_SIZE,
-                                      SKY_HEIGHT + r * BLOCK_SIZE, bt))
-            self.grid.append(row_list)
-
-        self.fossil_collected = {fp: False for fp in FOSSIL_PIECES}
-        all_cells = [(r, c) for r in range(3, GRID_ROWS) for c in range(GRID_COLS)]
-        chosen = random.sample(all_cells, len(FOSSIL_PIECES))
-        for fp, (r, c) in zip(FOSSIL_PIECES, chosen):
-            self.grid[r][c].block_type = fp
-            self.grid[r][c].max_hp = BLOCK_HP[fp]
-            self.grid[r][c].hp     = BLOCK_HP[fp]
-
-        self.inventory = {ore: 0 for ore in ORE_TYPES if ore != "grass"}
-        self.coins     = 10000
-
-        self.active_tool      = "fists"
-        self.owned_tools: dict[str, int] = {"fists": 999999}
-        self.dynamite_count   = 0
-        self.pickaxe_upgrades = {k: 0 for k in PICKAXE_UPGRADES}
-        self.fossil_complete  = False
-
-        self.font       = pygame.font.SysFont(None, 26)
-        self.font_med   = pygame.font.SysFont(None, 32)
-        self.font_large = pygame.font.SysFont(None, 42)
-        self.font_title = pygame.font.SysFont(None, 72)
-
-        self.state    = "game"
-        self.shop_tab = "sell"
+    def _load_full_fossil(self):
+        full_path = os.path.join(self.assets_dir, "images", "dip_fullfossil.png")
+        if not os.path.exists(full_path):
+            return None
+        raw = pygame.image.load(full_path).convert_alpha()
+        fw, fh = raw.get_size()
+        scale = min((SCREEN_WIDTH - 200) / fw, (SCREEN_HEIGHT - 200) / fh)
+        return pygame.transform.scale(raw, (int(fw * scale), int(fh * scale)))
+
+    async def load_assets(self):
+        # runs as a task next to the game loop, yielding between steps so
+        # frames keep coming while the rest of the assets arrive
+        await asyncio.sleep(0)
+        self.images.update(self.atlas_pages["extra"].load())
+        self._apply_images()
+        self.tile_imgs[:] = [self.block_imgs.get(n) for n in self.world.names]
+        self.terrain.clear()
+        self._hud_built_for = None
+        self.shop.assets_changed()
+
+        await asyncio.sleep(0)
+        self.fullfossil_img = self._load_full_fossil()
+
+        if not self.headless:
+            await asyncio.sleep(0)
+            # streamed rather than decoded up front as a Sound
+            pygame.mixer.init()
+            pygame.mixer.music.load(
+                os.path.join(self.assets_dir, "audio", "dip_backgroundmusic.ogg"))
+            pygame.mixer.music.set_volume(0.5)
+            pygame.mixer.music.play()
+        self.assets_ready = True
+
+    def _save_state(self, player_pos):
+        return {
+            "pos":              [player_pos.x, player_pos.y],
+            "coins":            self.coins,
+            "inventory":        dict(self.inventory),
+            "owned_tools":      dict(self.owned_tools),
+            "active_tool":      self.active_tool,
+            "dynamite_count":   self.dynamite_count,
+            "pickaxe_upgrades": dict(self.pickaxe_upgrades),
+            "fossil_collected": dict(self.fossil_collected),
+            "fossil_complete":  self.fossil_complete,
+            "blocks_mined":     dict(self.blocks_mined),
+            "owned_skins":      sorted(self.owned_skins),
+            "equipped_skin":    self.equipped_skin,
+        }
 
-        self._flash_msg = ""
-        self._flash_ttl = 0.0
+    def _load_state(self, state):
+        self.spawn_pos = tuple(state["pos"])
+        self.coins = state["coins"]
+        for name in ("inventory", "owned_tools", "pickaxe_upgrades",
+                     "fossil_collected"):
+            d = getattr(self, name)
+            d.clear()
+            d.update(state[name])
+        self.blocks_mined.update(state.get("blocks_mined", {}))
+        self.fossils_found   = sum(self.fossil_collected.values())
+        self.active_tool     = state["active_tool"]
+        self.dynamite_count  = state["dynamite_count"]
+        self.fossil_complete = state["fossil_complete"]
+        self.owned_skins     = set(state["owned_skins"])
+        self.equipped_skin   = state["equipped_skin"]
+
+    def save_game(self, player_pos):
+        if self.saves:
+            self.saves.save(self.seed, self.world, self._save_state(player_pos))
+        self._autosave_time = 0.0
+
+    def quit(self, player_pos):
+        # main() returns right after this; whoever started it shuts pygame
+        # down, so scripted runs and replays get control back
+        self.save_game(player_pos)
+
+    def generate_chunk(self, index):
+        return self.worldgen.rows(index * CHUNK_ROWS, CHUNK_ROWS)
 
     def _flash(self, msg, duration=1.4):
         self._flash_msg = msg
         self._flash_ttl = duration
 
-    def _effective_tool(self):
-        td = dict(TOOL_DEFS[self.active_tool])
-        td["unbreaking_cost"] = 4
-        if self.active_tool == "pickaxe":
-            upgs = self.pickaxe_upgrades
-            lv = upgs["fortune"]
-            if lv > 0:
-                td["fortune_mult"] = PICKAXE_UPGRADES["fortune"]["effects"][lv - 1]
-            lv = upgs["efficiency"]
-            if lv > 0:
-                td["damage"] = PICKAXE_UPGRADES["efficiency"]["effects"][lv - 1]
-            lv = upgs["unbreaking"]
-            if lv > 0:
-                td["unbreaking_cost"] = PICKAXE_UPGRADES["unbreaking"]["effects"][lv - 1]
-        return td
+    def flash_surface(self, color):
+        # the flash message at its current fade. It gets a surface of its
+        # own rather than one from TextCache, whose surfaces are shared and
+        # must not have their alpha changed
+        key = (self._flash_msg, color)
+        if key != self._flash_built_for:
+            self._flash_surf = self.font_large.render(self._flash_msg, True, color)
+            self._flash_built_for = key
+        self._flash_surf.set_alpha(min(255, int(self._flash_ttl * 300)))
+        return self._flash_surf
+
+    @property
+    def tool_stats(self):
+        # rebuilt only when the active tool or the pickaxe upgrades change
+        ts = self._tool_stats
+        if (ts is None or ts.tool != self.active_tool or
+                ts.version != self.pickaxe_upgrades.version):
+            version = self.pickaxe_upgrades.version
+            if self.active_tool == "pickaxe":
+                ts = ToolStats("pickaxe", TOOL_DEFS["pickaxe"], version,
+                               self.pickaxe_upgrades, PICKAXE_UPGRADES)
+            else:
+                ts = ToolStats(self.active_tool, TOOL_DEFS[self.active_tool],
+                               version)
+            self._tool_stats = ts
+        return ts
 
     def _damage_tool(self, block_type):
         if self.active_tool == "fists":
             return
         if self.active_tool == "pickaxe":
-            td = self._effective_tool()
-            cost = td["unbreaking_cost"]
+            cost = self.tool_stats.unbreaking_cost
         else:
             cost = ORE_HARDNESS.get(block_type, 1)
         self.owned_tools[self.active_tool] = max(
@@ -318,154 +522,114 @@ class digging:
     def get_block_at_world(self, wx, wy):
         col = int(wx) // BLOCK_SIZE
         row = (int(wy) - SKY_HEIGHT) // BLOCK_SIZE
-        if 0 <= row < GRID_ROWS and 0 <= col < GRID_COLS:
-            return self.grid[row][col]
-        return None
+        return self.world.block(row, col)
 
     def find_ground_y(self, player_x):
-        best = SKY_HEIGHT + GRID_ROWS * BLOCK_SIZE
+        # world.surface keeps the topmost solid row per column up to date
+        best = None
         for fx in [player_x + 4, player_x + PLAYER_WIDTH - 4]:
             col = int(fx) // BLOCK_SIZE
             if not (0 <= col < GRID_COLS):
                 continue
-            for r in range(GRID_ROWS):
-                b = self.grid[r][col]
-                if b.block_type != "air":
-                    cand = b.y - PLAYER_HEIGHT
-                    if cand < best:
-                        best = cand
-                    break
-        return best
+            cand = SKY_HEIGHT + self.world.surface[col] * BLOCK_SIZE - PLAYER_HEIGHT
+            if best is None or cand < best:
+                best = cand
+        return best if best is not None else SKY_HEIGHT - PLAYER_HEIGHT
 
     COLL_INSET_X   = 18
     COLL_INSET_TOP =  6
 
-    def _col_left(self, p):
-        return p.x + self.COLL_INSET_X
+    PLAYER_HITBOX = (COLL_INSET_X, COLL_INSET_TOP,
+                     PLAYER_WIDTH - 2 * COLL_INSET_X, PLAYER_HEIGHT - COLL_INSET_TOP)
+
+    def physics_step(self, player_pos, vvel, move_x):
+        return physics.step(self.world, player_pos, vvel, move_x,
+                            PHYSICS_DT, GRAVITY, self.PLAYER_HITBOX,
+                            WORLD_LEFT, WORLD_RIGHT)
+
+    def break_block(self, row, col, fortune=1.0, bulk=False):
+        name = self.world.names[self.world.tile(row, col)]
+        self.world.set(row, col, "air")
+        event = BlockBroken(name, row, col, self.active_tool, fortune, bulk)
+        for fn in self.on_block_broken:
+            fn(event)
+
+    def mine_area(self, blast, fortune=1.0, bulk=False):
+        # the whole area (and any chain it sets off) is damaged in one
+        # batch, then announced as one event per block name
+        result = run_blasts(self.world, [blast], BLAST_CHAINS)
+        tool = self.active_tool
+        for name, count in result.yields.items():
+            event = BlockBroken(name, blast.row, blast.col, tool, fortune, bulk, count)
+            for fn in self.on_block_broken:
+                fn(event)
+        return result
+
+    # block-broken subscribers
+
+    def _collect_ore(self, ev):
+        if ev.name not in self.inventory:
+            return
+        fortune = ev.fortune
+        amount = max(1, int(fortune)) * ev.count
+        if not ev.bulk:
+            for _ in range(ev.count):
+                if self.rng.random() < (fortune - int(fortune)):
+                    amount += 1
+        self.inventory[ev.name] += amount
+
+    def _collect_fossil(self, ev):
+        if ev.name not in FOSSIL_SET or self.fossil_collected[ev.name]:
+            return
+        self.fossil_collected[ev.name] = True
+        self.fossils_found += 1
+        self._flash(f"Fossil piece found! ({self.fossils_found}/{len(FOSSIL_PIECES)})", 2.0)
+        if self.fossils_found == len(FOSSIL_PIECES):
+            self.fossil_complete = True
+            self.state = "fossil"
 
-    def _col_right(self, p):
-        return p.x + PLAYER_WIDTH - self.COLL_INSET_X
+    def _wear_tool(self, ev):
+        if not ev.bulk:
+            for _ in range(ev.count):
+                self._damage_tool(ev.name)
 
-    def snap_player_to_ground(self, player_pos, vvel, on_ground):
-        feet_y = player_pos.y + PLAYER_HEIGHT
-        sample_xs = [
-            self._col_left(player_pos)  + 2,
-            player_pos.x + PLAYER_WIDTH // 2,
-            self._col_right(player_pos) - 2,
-        ]
-        for fx in sample_xs:
-            col = int(fx) // BLOCK_SIZE
-            if not (0 <= col < GRID_COLS):
-                continue
-            row = (int(feet_y) - SKY_HEIGHT) // BLOCK_SIZE
-            if not (0 <= row < GRID_ROWS):
-                continue
-            b = self.grid[row][col]
-            if b.block_type != "air" and vvel >= 0 and feet_y >= b.y:
-                player_pos.y = b.y - PLAYER_HEIGHT
-                vvel = 0
-                on_ground = True
-                break
-        return player_pos, vvel, on_ground
-
-    def snap_player_to_ceiling(self, player_pos, vvel):
-        head_y = player_pos.y + self.COLL_INSET_TOP
-        sample_xs = [
-            self._col_left(player_pos)  + 2,
-            player_pos.x + PLAYER_WIDTH // 2,
-            self._col_right(player_pos) - 2,
-        ]
-        for fx in sample_xs:
-            col = int(fx) // BLOCK_SIZE
-            if not (0 <= col < GRID_COLS):
-                continue
-            row = (int(head_y) - SKY_HEIGHT) // BLOCK_SIZE
-            if not (0 <= row < GRID_ROWS):
-                continue
-            b = self.grid[row][col]
-            if b.block_type != "air" and head_y < b.y + BLOCK_SIZE:
-                player_pos.y = b.y + BLOCK_SIZE - self.COLL_INSET_TOP
-                vvel = 0
-                break
-        return player_pos, vvel
-
-    def resolve_horizontal_block_collision(self, player_pos):
-        check_ys = [
-            player_pos.y + PLAYER_HEIGHT * 0.30,
-            player_pos.y + PLAYER_HEIGHT * 0.70,
-        ]
-        for cy in check_ys:
-            row = (int(cy) - SKY_HEIGHT) // BLOCK_SIZE
-            if not (0 <= row < GRID_ROWS):
-                continue
-            right_edge = self._col_right(player_pos)
-            right_col  = int(right_edge) // BLOCK_SIZE
-            if 0 <= right_col < GRID_COLS:
-                b = self.grid[row][right_col]
-                if b.block_type != "air" and right_edge > b.x:
-                    player_pos.x = float(b.x - PLAYER_WIDTH + self.COLL_INSET_X)
-            left_edge = self._col_left(player_pos)
-            left_col  = int(left_edge) // BLOCK_SIZE
-            if 0 <= left_col < GRID_COLS:
-                b = self.grid[row][left_col]
-                if b.block_type != "air" and left_edge < b.x + BLOCK_SIZE:
-                    player_pos.x = float(b.x + BLOCK_SIZE - self.COLL_INSET_X)
-        return player_pos
-
-    def clamp_to_walls(self, player_pos):
-        if player_pos.x < WORLD_LEFT:
-            player_pos.x = float(WORLD_LEFT)
-        if player_pos.x > WORLD_RIGHT:
-            player_pos.x = float(WORLD_RIGHT)
-        return player_pos
+    def _count_block(self, ev):
+        self.blocks_mined[ev.name] = self.blocks_mined.get(ev.name, 0) + ev.count
 
     def do_mine(self, hovered_block, player_pos, vvel, on_ground):
         bx, by = hovered_block
-        center_block = self.get_block_at_world(bx, by)
-        if not center_block or center_block.block_type == "air":
+        col = int(bx) // BLOCK_SIZE
+        row = (int(by) - SKY_HEIGHT) // BLOCK_SIZE
+        if row < 0 or not self.world.solid(row, col):
             return vvel, on_ground
 
-        td = self._effective_tool()
-        damage  = td["damage"]
-        radius  = td["mine_radius"]
-        fortune = td["fortune_mult"]
-
-        if radius > 0:
-            center_col = int(bx) // BLOCK_SIZE
-            center_row = (int(by) - SKY_HEIGHT) // BLOCK_SIZE
-            for dr in range(-radius, radius + 1):
-                for dc in range(-radius, radius + 1):
-                    r, c = center_row + dr, center_col + dc
-                    if 0 <= r < GRID_ROWS and 0 <= c < GRID_COLS:
-                        b = self.grid[r][c]
-                        if b.block_type != "air":
-                            ore = b.block_type
-                            b.block_type = "air"
-                            if ore in self.inventory:
-                                self.inventory[ore] += max(1, int(fortune))
+        ts = self.tool_stats
+        radius  = ts.mine_radius
+        fortune = ts.fortune_mult
+
+        if radius > 0 and self.active_tool == "dynamite":
+            self.mine_area(Blast(row, col, ts.mine_shape, radius, ts.damage),
+                           fortune, bulk=True)
+            # one stick is used up per blast
             self.dynamite_count -= 1
             del self.owned_tools["dynamite"]
             self.active_tool = "fists"
             if self.dynamite_count > 0:
                 self.owned_tools["dynamite"] = 1
                 self.active_tool = "dynamite"
-        else:
-            center_block.hp -= damage
-            if center_block.hp <= 0:
-                ore = center_block.block_type
-                center_block.block_type = "air"
-                if ore in FOSSIL_PIECES:
-                    self.fossil_collected[ore] = True
-                    self._flash(f"Fossil piece found! ({sum(self.fossil_collected.values())}/7)", 2.0)
-                    if all(self.fossil_collected.values()):
-                        self.fossil_complete = True
-                        self.state = "fossil"
-                elif ore in self.inventory:
-                    amount = max(1, int(fortune))
-                    if random.random() < (fortune - int(fortune)):
-                        amount += 1
-                    self.inventory[ore] += amount
-                self._damage_tool(ore)
+        elif radius > 0:
+            # shaped tools dig away from the player: sideways for the
+            # blocks beside them, down for the one under their feet and up
+            # for the one level with their body
+            prow, pcol = player_tile(player_pos, BLOCK_SIZE, SKY_HEIGHT)
+            if col != pcol:
+                direction = (0, 1 if col > pcol else -1)
+            else:
+                direction = (1 if row > prow else -1, 0)
+            self.mine_area(Blast(row, col, ts.mine_shape, radius, ts.damage,
+                                 direction), fortune)
+        elif self.world.damage(row, col, ts.damage) <= 0:
+            self.break_block(row, col, fortune)
 
         if self.find_ground_y(player_pos.x) > player_pos.y:
             on_ground = False
@@ -473,8 +637,8 @@ class digging:
         return vvel, on_ground
 
     def enter_shop(self, player_pos, vvel):
-        self.state    = "shop"
-        self.shop_tab = "sell"
+        self.state = "shop"
+        self.shop.open(self.viewport.to_logical(pygame.mouse.get_pos()))
         return vvel
 
     def exit_shop(self, player_pos, vvel):
@@ -492,68 +656,160 @@ class digging:
         self._flash("Not enough coins!", 1.0)
         return False
 
+    def sell_all(self, ore):
+        earned = self.inventory[ore] * ORE_PRICES[ore]
+        self.coins += earned
+        self._flash(f"+{earned} coins!")
+        self.inventory[ore] = 0
+
+    def buy_upgrade(self, upg_key):
+        upg    = PICKAXE_UPGRADES[upg_key]
+        cur_lv = self.pickaxe_upgrades[upg_key]
+        if self._buy(upg["costs"][cur_lv], f"{upg['label']} {cur_lv+1} unlocked!"):
+            self.pickaxe_upgrades[upg_key] += 1
+
+    def buy_dynamite(self):
+        if self._buy(TOOL_DEFS["dynamite"]["price"], "Dynamite purchased!"):
+            self.dynamite_count += 1
+            if "dynamite" not in self.owned_tools:
+                self.owned_tools["dynamite"] = 1
+                self.active_tool = "dynamite"
+
+    def buy_tool(self, tool_key):
+        td = TOOL_DEFS[tool_key]
+        if self._buy(td["price"], f"{td['label']} purchased!"):
+            self.owned_tools[tool_key] = td["base_durability"]
+            self.active_tool = tool_key
+
+    def equip_tool(self, tool_key):
+        self.active_tool = tool_key
+
+    def buy_skin(self):
+        if self._buy(10000, "Santa skin unlocked! Ho ho ho!"):
+            self.owned_skins.add("santa")
+
+    def toggle_skin(self):
+        self.equipped_skin = None if self.equipped_skin == "santa" else "santa"
+
+    def set_render_scale(self, scale):
+        if scale == self.render_scale:
+            return
+        self.render_scale = scale
+        self.terrain.set_scale(scale)
+        self._world_target = None
+        if scale != 1.0:
+            size = (round(SCREEN_WIDTH * scale), round(SCREEN_HEIGHT * scale))
+            self._world_target = pygame.Surface(size).convert()
+
+    def _sky(self):
+        s = self.render_scale
+        if s == 1.0:
+            return self.background_sky
+        cached = self._sky_scaled
+        if not cached or cached[0] != s or cached[1] is not self.background_sky:
+            w, h = self.background_sky.get_size()
+            cached = (s, self.background_sky, pygame.transform.smoothscale(
+                self.background_sky, (round(w * s), round(h * s))))
+            self._sky_scaled = cached
+        return cached[2]
+
     def draw_world(self, camera_y):
-        self.screen.fill((20, 12, 8))
+        target = self._world_target or self.screen
+        camera_y = round(camera_y * self.render_scale)
+        target.fill((20, 12, 8))
 
         sky_img_top_on_screen = -camera_y
         if sky_img_top_on_screen > 0:
-            self.screen.fill(self.sky_extend_color,
-                             (0, 0, SCREEN_WIDTH, sky_img_top_on_screen))
-        self.screen.blit(self.background_sky, (0, sky_img_top_on_screen))
-
-        for row in self.grid:
-            for block in row:
-                if block.block_type != "air":
-                    img = self.block_imgs.get(block.block_type)
-                    if img:
-                        sy = block.y - camera_y
-                        if -BLOCK_SIZE < sy < SCREEN_HEIGHT + BLOCK_SIZE:
-                            self.screen.blit(img, (block.x, sy))
-                            if block.hp < block.max_hp:
-                                dmg_frac = 1.0 - (block.hp / block.max_hp)
-                                alpha = int(dmg_frac * 160)
-                                tint = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
-                                tint.fill((0, 0, 0, alpha))
-                                self.screen.blit(tint, (block.x, sy))
-                                cx, cy2 = block.x + BLOCK_SIZE // 2, sy + BLOCK_SIZE // 2
-                                stages = int(dmg_frac * 4) + 1
-                                pygame.draw.line(self.screen, (180,160,120),
-                                                 (cx, cy2 - 20), (cx + 10, cy2 + 20), 2)
-                                if stages >= 2:
-                                    pygame.draw.line(self.screen, (180,160,120),
-                                                     (cx - 15, cy2 - 10), (cx + 5, cy2 + 15), 2)
-                                if stages >= 3:
-                                    pygame.draw.line(self.screen, (180,160,120),
-                                                     (cx + 8, cy2 - 25), (cx - 8, cy2 + 10), 2)
-                                    pygame.draw.line(self.screen, (180,160,120),
-                                                     (cx - 20, cy2 + 5), (cx + 20, cy2 - 5), 1)
-                                if stages >= 4:
-                                    pygame.draw.line(self.screen, (200,170,130),
-                                                     (cx - 25, cy2 - 20), (cx + 25, cy2 + 25), 2)
-                                    pygame.draw.line(self.screen, (200,170,130),
-                                                     (cx + 20, cy2 - 30), (cx - 15, cy2 + 30), 2)
+            target.fill(self.sky_extend_color,
+                        (0, 0, target.get_width(), sky_img_top_on_screen))
+        target.blit(self._sky(), (0, sky_img_top_on_screen))
+
+        self.terrain.draw(target, camera_y)
 
     def draw_fog(self, player_pos, camera_y, radius=250):
         if player_pos.y + PLAYER_HEIGHT < SKY_HEIGHT + BLOCK_SIZE:
             return
 
-        fog = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        fog.fill((0, 0, 0, 220))
-
+        s  = self.render_scale
         cx = int(player_pos.x + PLAYER_WIDTH // 2)
         cy = int(player_pos.y + PLAYER_HEIGHT // 2) - camera_y
-
-        for r in range(radius, 0, -4):
-            alpha = int(220 * (r / radius) ** 2)
-            pygame.draw.circle(fog, (0, 0, 0, alpha), (cx, cy), r)
-
-        pygame.draw.circle(fog, (0, 0, 0, 0), (cx, cy), radius // 3)
-        self.screen.blit(fog, (0, 0))
+        self.fog.draw(self._world_target or self.screen,
+                      (round(cx * s), round(cy * s)), round(radius * s))
+
+    def upscale_world(self):
+        # one scaling pass from the world target onto the screen
+        if self._world_target:
+            pygame.transform.scale(self._world_target,
+                                   (SCREEN_WIDTH, SCREEN_HEIGHT), self.screen)
+
+    def _radar_ring(self, name):
+        # one outline per colour, colour-keyed so blitting it only touches
+        # the border pixels
+        ring = self._radar_rings.get(name)
+        if ring is None:
+            size = BLOCK_SIZE - 12
+            ring = pygame.Surface((size, size)).convert()
+            ring.fill((255, 0, 255))
+            pygame.draw.rect(ring, RADAR_COLORS[name], (0, 0, size, size), 3,
+                             border_radius=6)
+            ring.set_colorkey((255, 0, 255), pygame.RLEACCEL)
+            self._radar_rings[name] = ring
+        return ring
+
+    def _build_radar_panel(self, row, col):
+        panel = pygame.Surface((220, 10 + 26 * len(RADAR_TARGETS)),
+                               pygame.SRCALPHA)
+        draw_rounded_rect(panel, (20, 20, 30), panel.get_rect(),
+                          radius=8, border_color=(60, 160, 220))
+        for i, (label, names) in enumerate(RADAR_TARGETS):
+            y   = 8 + 26 * i
+            hit = self.ores.nearest(names, row, col, RADAR_SCAN)
+            if not hit:
+                panel.blit(self.text.render(self.font, f"{label}: none",
+                                            (120, 120, 120)), (12, y))
+                continue
+            color  = RADAR_COLORS[names[0]]
+            dy, dx = hit[0] - row, hit[1] - col
+            dist   = math.hypot(dx, dy)
+            n = round(dist)
+            text = f"{label}: here" if not n else f"{label}: {n} block{'s' * (n != 1)}"
+            panel.blit(self.text.render(self.font, text, color), (12, y))
+            # pointer towards it, a dot when standing on it
+            cx, cy = 198, y + 9
+            tip = (cx + 9 * dx / (dist or 1), cy + 9 * dy / (dist or 1))
+            pygame.draw.line(panel, color, (cx, cy), tip, 3)
+            pygame.draw.circle(panel, color, tip, 3)
+        return panel
+
+    def draw_radar(self, player_pos, camera_y):
+        if self.active_tool != "radar":
+            return
+        bs  = BLOCK_SIZE
+        row = int(player_pos.y + PLAYER_HEIGHT // 2 - SKY_HEIGHT) // bs
+        col = int(player_pos.x + PLAYER_WIDTH // 2) // bs
+
+        # outline everything in range; the fog is already drawn, so these
+        # show through it
+        r = RADAR_RANGE
+        top = SKY_HEIGHT - camera_y + 6
+        rings = []
+        for orow, ocol, name in self.ores.in_rect(row - r, col - r, row + r, col + r):
+            if (orow - row) ** 2 + (ocol - col) ** 2 <= r * r:
+                rings.append((self._radar_ring(name), (ocol * bs + 6, top + orow * bs)))
+        self.screen.blits(rings, doreturn=False)
+
+        # the readout only changes when the player changes block or ore does
+        key = (row, col, self.ores.version)
+        if key != self._radar_built_for:
+            self._radar_panel = self._build_radar_panel(row, col)
+            self._radar_built_for = key
+        self.screen.blit(self._radar_panel,
+                         (SCREEN_WIDTH // 2 - self._radar_panel.get_width() // 2, 10))
 
     def draw_fossil_complete(self):
         self.screen.fill((180, 180, 180))
 
-        title = self.font_title.render("FOSSIL COMPLETE!", True, (40, 40, 40))
+        title = self.text.render(self.font_title, "FOSSIL COMPLETE!", (40, 40, 40))
         self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 40))
 
         if self.fullfossil_img:
@@ -563,443 +819,112 @@ class digging:
                              (SCREEN_WIDTH // 2 - iw // 2,
                               SCREEN_HEIGHT // 2 - ih // 2 + 30))
         else:
-            msg = self.font_large.render("(dip_fullfossil.png not found)", True, (100,100,100))
+            msg = self.text.render(self.font_large, "(dip_fullfossil.png not found)", (100,100,100))
             self.screen.blit(msg, (SCREEN_WIDTH // 2 - msg.get_width() // 2,
                                    SCREEN_HEIGHT // 2))
 
-        sub = self.font_med.render("You uncovered the ancient fossil!", True, (60, 60, 60))
+        sub = self.text.render(self.font_med, "You uncovered the ancient fossil!", (60, 60, 60))
         self.screen.blit(sub, (SCREEN_WIDTH // 2 - sub.get_width() // 2,
                                SCREEN_HEIGHT - 80))
 
-    def draw_hud(self, dt):
-        px, py = 10, SCREEN_HEIGHT - 50
+    def _hud_key(self):
+        return (self.inventory.version, self.owned_tools.version,
+                self.fossil_collected.version, self.pickaxe_upgrades.version,
+                self.coins, self.active_tool, self.dynamite_count)
+
+    def _build_hud(self):
+        # bottom-left panel, drawn into its own band so it can be reused
+        # until one of the fields in _hud_key() changes
+        top = SCREEN_HEIGHT - HUD_BAND
+        band = pygame.Surface((SCREEN_WIDTH, HUD_BAND), pygame.SRCALPHA)
+        px, py = 10, HUD_BAND - 50
         icon_sz, pad = 32, 8
         pw = 6 * (icon_sz + pad + 40) + pad
-        surf = pygame.Surface((pw, 48), pygame.SRCALPHA)
-        surf.fill((0, 0, 0, 140))
-        self.screen.blit(surf, (px - pad, py - 8))
+        band.fill((0, 0, 0, 140), (px - pad, py - 8, pw, 48))
         x = px
         for ore in ["soil", "stone", "copper", "gold", "diamond", "ruby"]:
-            self.screen.blit(self.hud_icons[ore], (x, py))
-            cs = self.font.render(str(self.inventory[ore]), True, (255, 255, 255))
-            self.screen.blit(cs, (x + icon_sz + 4, py + 8))
+            band.blit(self.hud_icons[ore], (x, py))
+            cs = self.text.render(self.font, str(self.inventory[ore]), (255, 255, 255))
+            band.blit(cs, (x + icon_sz + 4, py + 8))
             x += icon_sz + 4 + cs.get_width() + pad + 4
 
-        coin_surf = self.font_med.render(f"Coins: {self.coins}", True, (255, 215, 0))
-        self.screen.blit(coin_surf, (10, SCREEN_HEIGHT - 88))
+        coin_surf = self.text.render(self.font_med, f"Coins: {self.coins}", (255, 215, 0))
+        band.blit(coin_surf, (10, SCREEN_HEIGHT - 88 - top))
 
-        found = sum(self.fossil_collected.values())
-        fossil_surf = self.font_med.render(f"Fossils: {found}/7", True, (200, 190, 160))
-        self.screen.blit(fossil_surf, (10, SCREEN_HEIGHT - 116))
+        found = self.fossils_found
+        fossil_surf = self.text.render(self.font_med, f"Fossils: {found}/7", (200, 190, 160))
+        band.blit(fossil_surf, (10, SCREEN_HEIGHT - 116 - top))
 
-        td = self._effective_tool()
-        tool_label = td["label"]
+        ts = self.tool_stats
+        tool_label = ts.label
         if self.active_tool != "fists":
             dur = self.owned_tools.get(self.active_tool, 0)
-            max_dur = td["base_durability"]
+            max_dur = ts.base_durability
             dur_pct = dur / max_dur
             bar_w = 120
-            tool_surf = self.font_med.render(
-                f"{tool_label}  {dur}/{max_dur}", True, (200, 200, 200))
-            self.screen.blit(tool_surf, (10, SCREEN_HEIGHT - 124))
-            pygame.draw.rect(self.screen, (60, 60, 60),
-                             (10, SCREEN_HEIGHT - 104, bar_w, 8), border_radius=4)
+            tool_surf = self.text.render(self.font_med,
+                f"{tool_label}  {dur}/{max_dur}", (200, 200, 200))
+            band.blit(tool_surf, (10, SCREEN_HEIGHT - 124 - top))
+            pygame.draw.rect(band, (60, 60, 60),
+                             (10, SCREEN_HEIGHT - 104 - top, bar_w, 8), border_radius=4)
             bar_col = (80, 220, 80) if dur_pct > 0.4 else (
                        220, 180, 40) if dur_pct > 0.2 else (220, 60, 60)
-            pygame.draw.rect(self.screen, bar_col,
-                             (10, SCREEN_HEIGHT - 104, int(bar_w * dur_pct), 8),
+            pygame.draw.rect(band, bar_col,
+                             (10, SCREEN_HEIGHT - 104 - top, int(bar_w * dur_pct), 8),
                              border_radius=4)
             if self.active_tool == "dynamite":
-                ds = self.font.render(f"x{self.dynamite_count}", True, (255,120,80))
-                self.screen.blit(ds, (140, SCREEN_HEIGHT - 124))
+                ds = self.text.render(self.font, f"x{self.dynamite_count}", (255,120,80))
+                band.blit(ds, (140, SCREEN_HEIGHT - 124 - top))
         else:
-            tool_surf = self.font_med.render(tool_label, True, (180, 180, 180))
-            self.screen.blit(tool_surf, (10, SCREEN_HEIGHT - 124))
-
+            tool_surf = self.text.render(self.font_med, tool_label, (180, 180, 180))
+            band.blit(tool_surf, (10, SCREEN_HEIGHT - 124 - top))
+        # keep only the painted part so the per-frame blit stays small
+        used = band.get_bounding_rect()
+        self._hud_band = band.subsurface(used).copy()
+        self._hud_band_pos = (used.x, top + used.y)
+
+    def _build_hud_corner(self):
+        # the shop button never changes, so it is built once
         bw, bh = 170, 46
-        bx2, by2 = SCREEN_WIDTH - bw - 12, 12
-        draw_rounded_rect(self.screen, (160, 120, 20),
+        corner = pygame.Surface((bw + 24, 90), pygame.SRCALPHA)
+        bx2, by2 = 12, 12
+        draw_rounded_rect(corner, (160, 120, 20),
                           (bx2, by2, bw, bh), radius=8,
                           border_color=(255, 215, 0), border_width=2)
-        lbl = self.font_med.render("[ T ]  Shop", True, (255, 255, 255))
-        self.screen.blit(lbl, (bx2 + (bw - lbl.get_width()) // 2,
-                               by2 + (bh - lbl.get_height()) // 2))
-        hint = self.font.render("or walk right ->", True, (255, 230, 100))
-        self.screen.blit(hint, (SCREEN_WIDTH - hint.get_width() - 12, 64))
+        lbl = self.text.render(self.font_med, "[ T ]  Shop", (255, 255, 255))
+        corner.blit(lbl, (bx2 + (bw - lbl.get_width()) // 2,
+                          by2 + (bh - lbl.get_height()) // 2))
+        hint = self.text.render(self.font, "or walk right ->", (255, 230, 100))
+        corner.blit(hint, (corner.get_width() - hint.get_width() - 12, 64))
+        self._hud_corner = corner
 
+    def draw_hud(self, dt):
+        key = self._hud_key()
+        if key != self._hud_built_for:
+            self._build_hud()
+            self._hud_built_for = key
+        if self._hud_corner is None:
+            self._build_hud_corner()
+        self.screen.blit(self._hud_band, self._hud_band_pos)
+        self.screen.blit(self._hud_corner,
+                         (SCREEN_WIDTH - self._hud_corner.get_width(), 0))
+
+        # the flash fades every frame, so it stays out of the cached band
         if self._flash_ttl > 0:
             self._flash_ttl -= dt
-            fs = self.font_large.render(self._flash_msg, True, (80, 220, 80))
-            fs.set_alpha(min(255, int(self._flash_ttl * 300)))
+            fs = self.flash_surface((80, 220, 80))
             self.screen.blit(fs, (SCREEN_WIDTH // 2 - fs.get_width() // 2,
                                   SCREEN_HEIGHT // 2 - 60))
 
-    def _tab_button(self, label, rect, active):
-        col    = (55, 55, 62)  if active else (35, 35, 40)
-        border = (255, 215, 0) if active else (90, 90, 100)
-        draw_rounded_rect(self.screen, col, rect, radius=8,
-                          border_color=border, border_width=2)
-        txt = self.font_large.render(
-            label, True, (255, 255, 255) if active else (140, 140, 150))
-        self.screen.blit(txt, (rect[0] + (rect[2] - txt.get_width())  // 2,
-                               rect[1] + (rect[3] - txt.get_height()) // 2))
-
-    def draw_shop(self, dt, mouse_pos, mouse_clicked):
-        self.screen.fill((22, 22, 28))
-
-        title = self.font_title.render("SHOP", True, (220, 220, 230))
-        self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 14))
-        coins_s = self.font_large.render(f"Coins: {self.coins}", True, (255, 215, 0))
-        self.screen.blit(coins_s, (SCREEN_WIDTH // 2 - coins_s.get_width() // 2, 78))
-
-        tab_y = 126
-        tab_h = 46
-        tab_w = 155
-        gap   = 12
-        total_w = 4 * tab_w + 3 * gap
-        start_x = SCREEN_WIDTH // 2 - total_w // 2
-        sell_rect = (start_x,                     tab_y, tab_w, tab_h)
-        upg_rect  = (start_x +   tab_w +   gap,   tab_y, tab_w, tab_h)
-        tool_rect = (start_x + 2*(tab_w +   gap),  tab_y, tab_w, tab_h)
-        skin_rect = (start_x + 3*(tab_w +   gap),  tab_y, tab_w, tab_h)
-
-        self._tab_button("Sell Blocks", sell_rect, self.shop_tab == "sell")
-        self._tab_button("Upgrades",   upg_rect,  self.shop_tab == "upgrades")
-        self._tab_button("Tools",      tool_rect,  self.shop_tab == "tools")
-        self._tab_button("Skins",      skin_rect,  self.shop_tab == "skins")
-
-        if mouse_clicked:
-            mx, my = mouse_pos
-            for tab_name, rect in [("sell",      sell_rect),
-                                    ("upgrades",  upg_rect),
-                                    ("tools",     tool_rect),
-                                    ("skins",     skin_rect)]:
-                if rect[0] <= mx <= rect[0]+rect[2] and rect[1] <= my <= rect[1]+rect[3]:
-                    self.shop_tab = tab_name
-
-        content_rect = pygame.Rect(60, 188, SCREEN_WIDTH - 120, SCREEN_HEIGHT - 300)
-        draw_rounded_rect(self.screen, (32, 32, 40), content_rect,
-                          radius=12, border_color=(60, 60, 72), border_width=2)
-
-        if self.shop_tab == "sell":
-            self._draw_sell_tab(content_rect, mouse_pos, mouse_clicked)
-        elif self.shop_tab == "upgrades":
-            self._draw_upgrades_tab(content_rect, mouse_pos, mouse_clicked)
-        elif self.shop_tab == "tools":
-            self._draw_tools_tab(content_rect, mouse_pos, mouse_clicked)
-        else:
-            self._draw_skins_tab(content_rect, mouse_pos, mouse_clicked)
-
-        ex_w, ex_h = 220, 50
-        ex_x = SCREEN_WIDTH // 2 - ex_w // 2
-        ex_y = SCREEN_HEIGHT - 72
-        draw_rounded_rect(self.screen, (55, 30, 30), (ex_x, ex_y, ex_w, ex_h),
-                          radius=8, border_color=(180, 70, 70), border_width=2)
-        el = self.font_large.render("[ ESC ]  Exit", True, (220, 160, 160))
-        self.screen.blit(el, (ex_x + (ex_w - el.get_width())  // 2,
-                              ex_y + (ex_h - el.get_height()) // 2))
-
-        if self._flash_ttl > 0:
-            self._flash_ttl -= dt
-            col = (80,220,80) if "Not" not in self._flash_msg else (220,80,80)
-            fs = self.font_large.render(self._flash_msg, True, col)
-            fs.set_alpha(min(255, int(self._flash_ttl * 300)))
-            self.screen.blit(fs, (SCREEN_WIDTH // 2 - fs.get_width() // 2,
-                                  SCREEN_HEIGHT - 130))
-
-    def _draw_sell_tab(self, area, mouse_pos, mouse_clicked):
-        ores   = ["soil", "stone", "copper", "gold", "diamond", "ruby"]
-        cols   = 3
-        row_h  = 88
-        col_w  = (area.width - 40) // cols
-        sx, sy = area.x + 20, area.y + 16
-
-        for i, ore in enumerate(ores):
-            ci = i % cols
-            ri = i // cols
-            rx = sx + ci * col_w
-            ry = sy + ri * row_h
-
-            row_rect = pygame.Rect(rx, ry, col_w - 10, row_h - 8)
-            draw_rounded_rect(self.screen, (42, 42, 52), row_rect,
-                              radius=8, border_color=(60, 60, 72), border_width=1)
-
-            self.screen.blit(self.shop_icons[ore], (rx + 8, ry + (row_h-8-48)//2))
-
-            name_s  = self.font_med.render(ore.capitalize(), True, (210,210,210))
-            count_s = self.font.render(f"x{self.inventory[ore]}", True, (160,160,160))
-            price_s = self.font.render(f"{ORE_PRICES[ore]}c ea", True, (255,215,0))
-            self.screen.blit(name_s,  (rx+62, ry+8))
-            self.screen.blit(count_s, (rx+62, ry+32))
-            self.screen.blit(price_s, (rx+62, ry+52))
-
-            bw, bh = 76, 28
-            bx2 = rx + col_w - 18 - bw
-            by2 = ry + (row_h - 8 - bh) // 2
-            has = self.inventory[ore] > 0
-            draw_rounded_rect(self.screen,
-                              (38,110,38) if has else (45,45,45),
-                              (bx2,by2,bw,bh), radius=6,
-                              border_color=(70,190,70) if has else (65,65,65),
-                              border_width=1)
-            sl = self.font.render("Sell All", True,
-                                  (210,255,210) if has else (90,90,90))
-            self.screen.blit(sl, (bx2+(bw-sl.get_width())//2,
-                                  by2+(bh-sl.get_height())//2))
-            if mouse_clicked and has:
-                mx, my = mouse_pos
-                if bx2 <= mx <= bx2+bw and by2 <= my <= by2+bh:
-                    earned = self.inventory[ore] * ORE_PRICES[ore]
-                    self.coins += earned
-                    self._flash(f"+{earned} coins!")
-                    self.inventory[ore] = 0
-
-    def _draw_upgrades_tab(self, area, mouse_pos, mouse_clicked):
-        has_pick = "pickaxe" in self.owned_tools
-
-        if not has_pick:
-            msg = self.font_large.render(
-                "Buy a Pickaxe in the Tools tab first.", True, (160,100,60))
-            self.screen.blit(msg, (area.x + (area.width-msg.get_width())//2,
-                                   area.y + 60))
-            return
-
-        upg_names = ["fortune", "efficiency", "unbreaking"]
-        row_h = (area.height - 40) // 3
-        sx, sy = area.x + 24, area.y + 16
-
-        for i, upg_key in enumerate(upg_names):
-            upg    = PICKAXE_UPGRADES[upg_key]
-            cur_lv = self.pickaxe_upgrades[upg_key]
-            ry     = sy + i * row_h
-
-            row_rect = pygame.Rect(sx, ry, area.width - 48, row_h - 10)
-            draw_rounded_rect(self.screen, (38, 40, 50), row_rect,
-                              radius=8, border_color=(58,60,74), border_width=1)
-
-            label_s = self.font_large.render(upg["label"], True, (220,220,230))
-            desc_s  = self.font.render(upg["description"], True, (140,140,155))
-            self.screen.blit(label_s, (sx+14, ry+10))
-            self.screen.blit(desc_s,  (sx+14, ry+42))
-
-            for lv in range(1, 4):
-                pip_x = sx + 14 + (lv-1)*36
-                pip_y = ry + 66
-                filled = lv <= cur_lv
-                pygame.draw.circle(self.screen,
-                                   (255,200,40) if filled else (55,55,65),
-                                   (pip_x+10, pip_y+10), 10)
-                pygame.draw.circle(self.screen, (90,90,100),
-                                   (pip_x+10, pip_y+10), 10, 2)
-                if upg_key == "unbreaking":
-                    cost_lbl = self.font.render(
-                        f"-{PICKAXE_UPGRADES['unbreaking']['effects'][lv-1]}/hit",
-                        True, (255,200,40) if filled else (80,80,90))
-                    self.screen.blit(cost_lbl, (pip_x + 2, pip_y + 23))
-
-            if cur_lv < 3:
-                cost = upg["costs"][cur_lv]
-                can_buy = self.coins >= cost
-                bw, bh = 130, 36
-                bx2 = sx + area.width - 48 - bw - 14
-                by2 = ry + (row_h - 10 - bh) // 2
-                draw_rounded_rect(self.screen,
-                                  (35,100,40) if can_buy else (42,42,42),
-                                  (bx2,by2,bw,bh), radius=6,
-                                  border_color=(70,180,70) if can_buy else (62,62,62),
-                                  border_width=1)
-                bl = self.font_med.render(
-                    f"Upgrade  {cost}c", True,
-                    (200,255,200) if can_buy else (85,85,85))
-                self.screen.blit(bl, (bx2+(bw-bl.get_width())//2,
-                                      by2+(bh-bl.get_height())//2))
-                if mouse_clicked and can_buy:
-                    mx, my = mouse_pos
-                    if bx2 <= mx <= bx2+bw and by2 <= my <= by2+bh:
-                        if self._buy(cost, f"{upg['label']} {cur_lv+1} unlocked!"):
-                            self.pickaxe_upgrades[upg_key] += 1
-            else:
-                maxed = self.font_med.render("MAX", True, (255,200,40))
-                bx2 = sx + area.width - 48 - 130 - 14
-                by2 = ry + (row_h - 10 - 36) // 2
-                self.screen.blit(maxed, (bx2+40, by2+6))
-
-    def _draw_tools_tab(self, area, mouse_pos, mouse_clicked):
-        tools = ["pickaxe", "dynamite", "radar", "drill"]
-        cols  = 2
-        col_w = (area.width - 40) // cols
-        row_h = (area.height - 30) // 2
-        sx, sy = area.x + 20, area.y + 12
-
-        for i, tool_key in enumerate(tools):
-            ci = i % cols
-            ri = i // cols
-            rx = sx + ci * col_w
-            ry = sy + ri * row_h
-            td = TOOL_DEFS[tool_key]
-
-            card = pygame.Rect(rx, ry, col_w - 12, row_h - 10)
-            draw_rounded_rect(self.screen, (38, 40, 50), card,
-                              radius=10, border_color=(58,60,74), border_width=1)
-
-            self.screen.blit(self.tool_imgs[tool_key], (rx+10, ry+10))
-
-            name_s = self.font_large.render(td["label"], True, (220,220,230))
-            self.screen.blit(name_s, (rx+68, ry+10))
-
-            desc_s = self.font.render(td["description"], True, (130,130,145))
-            self.screen.blit(desc_s, (rx+68, ry+42))
-
-            stats = (f"DMG:{td['damage']}  "
-                     f"DUR:{td['base_durability']}  "
-                     f"FORT:x{td['fortune_mult']}")
-            stat_s = self.font.render(stats, True, (100,160,200))
-            self.screen.blit(stat_s, (rx+68, ry+64))
-
-            owned = tool_key in self.owned_tools
-            if tool_key == "dynamite":
-                owned = self.dynamite_count > 0
-
-            bw, bh = 120, 34
-            bx2 = card.right - bw - 10
-            by2 = card.bottom - bh - 10
-
-            if tool_key == "dynamite":
-                can_buy = self.coins >= td["price"]
-                draw_rounded_rect(self.screen,
-                                  (35,100,40) if can_buy else (42,42,42),
-                                  (bx2,by2,bw,bh), radius=6,
-                                  border_color=(70,180,70) if can_buy else (62,62,62),
-                                  border_width=1)
-                cnt_txt = f"Buy ({td['price']}c)"
-                if self.dynamite_count > 0:
-                    cnt_txt += f"  x{self.dynamite_count}"
-                bl = self.font.render(cnt_txt, True,
-                                      (200,255,200) if can_buy else (85,85,85))
-                self.screen.blit(bl, (bx2+(bw-bl.get_width())//2,
-                                      by2+(bh-bl.get_height())//2))
-                if mouse_clicked and can_buy:
-                    mx, my = mouse_pos
-                    if bx2 <= mx <= bx2+bw and by2 <= my <= by2+bh:
-                        if self._buy(td["price"], "Dynamite purchased!"):
-                            self.dynamite_count += 1
-                            if "dynamite" not in self.owned_tools:
-                                self.owned_tools["dynamite"] = 1
-                                self.active_tool = "dynamite"
-
-            elif owned:
-                is_active = self.active_tool == tool_key
-                draw_rounded_rect(self.screen,
-                                  (50,50,130) if is_active else (38,80,100),
-                                  (bx2,by2,bw,bh), radius=6,
-                                  border_color=(100,100,230) if is_active else (60,130,160),
-                                  border_width=1)
-                label_txt = "Equipped" if is_active else "Equip"
-                bl = self.font_med.render(label_txt, True,
-                                          (160,160,255) if is_active else (160,210,230))
-                self.screen.blit(bl, (bx2+(bw-bl.get_width())//2,
-                                      by2+(bh-bl.get_height())//2))
-                if mouse_clicked and not is_active:
-                    mx, my = mouse_pos
-                    if bx2 <= mx <= bx2+bw and by2 <= my <= by2+bh:
-                        self.active_tool = tool_key
-
-                dur = self.owned_tools.get(tool_key, 0)
-                max_dur = td["base_durability"]
-                dur_s = self.font.render(
-                    f"Durability: {dur}/{max_dur}", True, (160,160,160))
-                self.screen.blit(dur_s, (rx+10, by2-2))
+    async def main(self, frames=None, fixed_dt=None):
+        # frames limits the run (None = forever); fixed_dt replaces the
+        # measured frame time and lifts the 60 fps cap, so headless runs are
+        # repeatable. A replay's input source supplies its recorded dt instead.
+        # Returns once the frames run out or a QUIT event arrives.
 
-            else:
-                can_buy = self.coins >= td["price"]
-                draw_rounded_rect(self.screen,
-                                  (35,100,40) if can_buy else (42,42,42),
-                                  (bx2,by2,bw,bh), radius=6,
-                                  border_color=(70,180,70) if can_buy else (62,62,62),
-                                  border_width=1)
-                bl = self.font_med.render(
-                    f"Buy  {td['price']}c", True,
-                    (200,255,200) if can_buy else (85,85,85))
-                self.screen.blit(bl, (bx2+(bw-bl.get_width())//2,
-                                      by2+(bh-bl.get_height())//2))
-                if mouse_clicked and can_buy:
-                    mx, my = mouse_pos
-                    if bx2 <= mx <= bx2+bw and by2 <= my <= by2+bh:
-                        if self._buy(td["price"], f"{td['label']} purchased!"):
-                            self.owned_tools[tool_key] = td["base_durability"]
-                            self.active_tool = tool_key
-
-    def _draw_skins_tab(self, area, mouse_pos, mouse_clicked):
-        sx, sy = area.x + 30, area.y + 20
-
-        card = pygame.Rect(sx, sy, area.width - 60, 160)
-        draw_rounded_rect(self.screen, (38, 40, 50), card,
-                          radius=10, border_color=(58, 60, 74), border_width=1)
-
-        # Preview image
-        preview_size = 100
-        preview_img = self.player_img_santa if self.player_img_santa else self.player_img_default
-        preview = pygame.transform.scale(preview_img, (preview_size, preview_size))
-        self.screen.blit(preview, (sx + 20, sy + 30))
-
-        name_s  = self.font_large.render("Santa Skin", True, (220, 220, 230))
-        price_s = self.font_med.render("10,000 coins", True, (255, 215, 0))
-        self.screen.blit(name_s,  (sx + 140, sy + 20))
-        self.screen.blit(price_s, (sx + 140, sy + 58))
-
-        owned = "santa" in self.owned_skins
-        bw, bh = 140, 38
-        bx2 = card.right - bw - 20
-        by2 = sy + (card.height - bh) // 2
-
-        if not owned:
-            can_buy = self.coins >= 10000
-            draw_rounded_rect(self.screen,
-                              (35, 100, 40) if can_buy else (42, 42, 42),
-                              (bx2, by2, bw, bh), radius=6,
-                              border_color=(70, 180, 70) if can_buy else (62, 62, 62),
-                              border_width=1)
-            bl = self.font_med.render("Buy 10,000c", True,
-                                      (200, 255, 200) if can_buy else (85, 85, 85))
-            self.screen.blit(bl, (bx2 + (bw - bl.get_width()) // 2,
-                                  by2 + (bh - bl.get_height()) // 2))
-            if mouse_clicked and can_buy:
-                mx, my = mouse_pos
-                if bx2 <= mx <= bx2 + bw and by2 <= my <= by2 + bh:
-                    if self._buy(10000, "Santa skin unlocked! Ho ho ho!"):
-                        self.owned_skins.add("santa")
-        else:
-            is_equipped = self.equipped_skin == "santa"
-            draw_rounded_rect(self.screen,
-                              (50, 50, 130) if is_equipped else (38, 80, 100),
-                              (bx2, by2, bw, bh), radius=6,
-                              border_color=(100, 100, 230) if is_equipped else (60, 130, 160),
-                              border_width=1)
-            lbl_txt = "Unequip" if is_equipped else "Equip"
-            bl = self.font_med.render(lbl_txt, True,
-                                      (160, 160, 255) if is_equipped else (160, 210, 230))
-            self.screen.blit(bl, (bx2 + (bw - bl.get_width()) // 2,
-                                  by2 + (bh - bl.get_height()) // 2))
-            if mouse_clicked:
-                mx, my = mouse_pos
-                if bx2 <= mx <= bx2 + bw and by2 <= my <= by2 + bh:
-                    if is_equipped:
-                        self.equipped_skin = None
-                        self.player_img = self.player_img_default
-                    else:
-                        self.equipped_skin = "santa"
-                        self.player_img = self.player_img_santa or self.player_img_default
-
-            status_s = self.font.render(
-                "Equipped" if is_equipped else "Owned", True,
-                (100, 200, 100) if is_equipped else (160, 160, 160))
-            self.screen.blit(status_s, (sx + 140, sy + 95))
-
-    async def main(self):
-        pygame.mixer.init()
-        sound_effect = pygame.mixer.Sound("assets/audio/dip_backgroundmusic.ogg")
-        sound_effect.set_volume(0.5)
-        sound_effect.play()
+        # picks up once the loop first yields, i.e. after the first frame
+        if not self.assets_ready and self._asset_task is None:
+            self._asset_task = asyncio.create_task(self.load_assets())
 
         # initial player position: place above the first solid block at x=400
         # (previously we hardcoded a block offset which could land the
@@ -1012,8 +937,8 @@ class digging:
         speed         = 300
         vvel          = 0.0
         on_ground     = True  # we're already on the ground at start
-        ground_y      = SKY_HEIGHT + GRID_ROWS * BLOCK_SIZE
         hovered_block = None
+        accumulator   = 0.0
 
         # start the game teleported right next to the shop trigger
         # (just a few pixels left of it) while remaining in the game state.
@@ -1022,61 +947,117 @@ class digging:
         player_pos.y = self.find_ground_y(player_pos.x) - PLAYER_HEIGHT
         on_ground = True
         # state remains "game"; do not call enter_shop
-
-        while True:
-            dt = self.clock.tick(60) / 1000
-            mouse_pos     = pygame.mouse.get_pos()
-            mouse_clicked = False
+        if self.spawn_pos:
+            player_pos.update(self.spawn_pos)
+        prev_pos = player_pos.copy()
+        fossil_drawn = False   # fossil art the completion screen was drawn with
+        # resolution only adapts in live play, so scripted runs stay repeatable
+        adaptive = fixed_dt is None
+
+        while frames is None or frames > 0:
+            if frames is not None:
+                frames -= 1
+            if fixed_dt is None:
+                dt = await self.scheduler.next_frame()
+            else:
+                self.clock.tick()
+                dt = fixed_dt
+            work_start = time.perf_counter()
+            prof = self.profiler
+            prof.begin()
+            keys, events = self.input.poll()
+            dt = self.input.frame_dt(dt)
+            for event in events:
+                if event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+                    prof.toggle()
+                elif event.type == pygame.KEYDOWN and event.key == PROFILER_DUMP_KEY:
+                    prof.dump(PROFILER_DUMP_PATH)
+                    self._flash(f"Profile written to {PROFILER_DUMP_PATH}")
+                elif event.type == pygame.VIDEORESIZE:
+                    self.viewport.sync()
+                    self.screen = self.viewport.canvas
+                    self.shop.dirty = True
+            prof.mark("input")
 
             # FOSSIL COMPLETE SCREEN
             if self.state == "fossil":
-                for event in pygame.event.get():
+                for event in events:
                     if event.type == pygame.QUIT:
-                        pygame.quit(); sys.exit()
-                self.draw_fossil_complete()
-                pygame.display.flip()
+                        self.quit(player_pos)
+                        return
+                # static: redraw only on input or once the art has loaded
+                redraw = bool(events) or fossil_drawn is not self.fullfossil_img
+                if redraw:
+                    self.draw_fossil_complete()
+                    fossil_drawn = self.fullfossil_img
+                    prof.mark("draw")
+                    self.viewport.present()
+                    prof.mark("flip")
+                self.scheduler.idle = not redraw
+                prof.end()
                 await asyncio.sleep(0)
                 continue
 
             # SHOP
             if self.state == "shop":
-                for event in pygame.event.get():
+                for event in events:
                     if event.type == pygame.QUIT:
-                        pygame.quit(); sys.exit()
+                        self.quit(player_pos)
+                        return
                     if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                         player_pos, vvel, on_ground = self.exit_shop(player_pos, vvel)
-                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                        mouse_clicked = True
-                self.draw_shop(dt, mouse_pos, mouse_clicked)
-                pygame.display.flip()
+                        prev_pos.update(player_pos)
+                    else:
+                        self.shop.handle_event(event)
+                # an idle shop leaves the last frame on screen untouched
+                drew = self.state == "shop" and self.shop.draw(self.screen, dt)
+                if drew:
+                    prof.mark("shop")
+                    self.viewport.present()
+                    prof.mark("flip")
+                self.scheduler.idle = not (drew or events)
+                prof.end()
                 await asyncio.sleep(0)
                 continue
 
             # GAME
-            player_pos, vvel, on_ground, hovered_block, self.facing, draw_img = movement(
-                player_pos, vvel, on_ground, speed, dt, ground_y, self.player_img,
-                self.facing,
-                gravity=GRAVITY, jump_force=JUMP_FORCE,
+            self.scheduler.idle = False
+            move_x, vvel, on_ground, hovered_block, self.facing = movement(
+                keys, player_pos, vvel, on_ground, speed, self.facing,
+                jump_force=JUMP_FORCE,
                 block_size=BLOCK_SIZE, sky_height=SKY_HEIGHT,
                 max_x=WORLD_RIGHT, min_x=WORLD_LEFT
             )
-            player_pos, vvel, on_ground = self.snap_player_to_ground(
-                player_pos, vvel, on_ground)
-            if vvel < 0:
-                player_pos, vvel = self.snap_player_to_ceiling(player_pos, vvel)
-            player_pos = self.resolve_horizontal_block_collision(player_pos)
-            player_pos = self.clamp_to_walls(player_pos)
+            prof.mark("movement")
+            accumulator = min(accumulator + dt, PHYSICS_DT * MAX_PHYSICS_STEPS)
+            while accumulator >= PHYSICS_DT:
+                prev_pos.update(player_pos)
+                player_pos, vvel, on_ground = self.physics_step(
+                    player_pos, vvel, move_x)
+                accumulator -= PHYSICS_DT
+            # draw between the last two ticks so motion stays smooth at any fps
+            render_pos = prev_pos.lerp(player_pos, accumulator / PHYSICS_DT)
+            prof.mark("physics")
 
             if (player_pos.x >= SHOP_TRIGGER_X and
                     player_pos.y <= SKY_HEIGHT - PLAYER_HEIGHT + 8):
                 vvel = self.enter_shop(player_pos, vvel)
+                prof.end()
                 continue
 
-            camera_y = int(player_pos.y - SCREEN_HEIGHT // 2)
+            camera_y = int(render_pos.y - SCREEN_HEIGHT // 2)
+            if adaptive:
+                self.set_render_scale(self.scaler.scale)
+            self.world.focus(self.world.rows_in_view(camera_y, SCREEN_HEIGHT))
+
+            self._autosave_time += dt
+            if self._autosave_time >= AUTOSAVE_SECONDS:
+                self.save_game(player_pos)
 
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
+                    self.quit(player_pos)
+                    return
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_e and hovered_block:
                         vvel, on_ground = self.do_mine(
@@ -1086,9 +1067,17 @@ class digging:
                         player_pos.y = float(SKY_HEIGHT - PLAYER_HEIGHT)
                         vvel = 0.0
                         on_ground = True
+                        prev_pos.update(player_pos)
+            prof.mark("mining")
 
             self.draw_world(camera_y)
-            self.draw_fog(player_pos, camera_y)
+            prof.mark("world")
+            self.draw_fog(render_pos, camera_y)
+            prof.mark("fog")
+            self.upscale_world()
+            prof.mark("upscale")
+            self.draw_radar(render_pos, camera_y)
+            prof.mark("radar")
 
             if hovered_block:
                 bx, by = hovered_block
@@ -1109,17 +1098,30 @@ class digging:
                     pygame.draw.rect(self.screen, bar_col,
                                      (bar_x, bar_y, int(bar_w * hp_frac), bar_h),
                                      border_radius=3)
-                    hp_txt = self.font.render(f"{block.hp}/{block.max_hp}", True, (220,220,220))
+                    hp_txt = self.text.render(self.font, f"{block.hp}/{block.max_hp}", (220,220,220))
                     txt_x  = min(bar_x, SCREEN_WIDTH - hp_txt.get_width() - 4)
                     self.screen.blit(hp_txt, (txt_x, bar_y - hp_txt.get_height() - 2))
 
-            self.screen.blit(draw_img,
-                             (int(player_pos.x), int(player_pos.y) - camera_y))
+            sprite = self.sprites.get(self.equipped_skin or "default", self.facing)
+            self.screen.blit(sprite,
+                             (int(render_pos.x), int(render_pos.y) - camera_y))
+            prof.mark("sprites")
             self.draw_hud(dt)
-            pygame.display.flip()
+            prof.mark("hud")
+            sched = self.scheduler
+            prof.draw(self.screen, self.font, (8, 8),
+                      f"fps {sched.fps:.1f} / {sched.rate}  "
+                      f"res {self.render_scale:.0%}")
+            prof.mark("profiler")
+            self.viewport.present()
+            prof.mark("flip")
+            prof.end()
+            if adaptive:
+                self.scaler.update(time.perf_counter() - work_start)
             await asyncio.sleep(0)
 
 
 if __name__ == "__main__":
-    game = digging()
-    asyncio.run(game.main())
\ No newline at end of file
+    game = digging(save_store=default_store(SAVE_PATH))
+    asyncio.run(game.main())
+    pygame.quit()
@@ -0,0 +1,144 @@
+from collections import deque
+
+
+class BlockBroken:
+    # Blocks leaving the world. Subscribers get this and nothing else,
+    # so single hits and blasts go through the same pipeline.
+    #   name     block name before it turned to air
+    #   row/col  where it broke; for an area, the centre of the blast
+    #   tool     tool that broke it
+    #   fortune  fortune multiplier in effect
+    #   bulk     True when broken by a blast (dynamite etc.), which skips
+    #            per-block rolls and per-block tool wear
+    #   count    how many blocks of this name the event stands for; an area
+    #            is announced as one event per name
+    __slots__ = ("name", "row", "col", "tool", "fortune", "bulk", "count")
+
+    def __init__(self, name, row, col, tool, fortune=1.0, bulk=False, count=1):
+        self.name    = name
+        self.row     = row
+        self.col     = col
+        self.tool    = tool
+        self.fortune = fortune
+        self.bulk    = bulk
+        self.count   = count
+
+
+class ToolStats:
+    # The active tool's numbers with upgrades folded in. Built once per
+    # (tool, upgrades version) and then read as plain attributes.
+    __slots__ = ("tool", "version", "label", "damage", "fortune_mult",
+                 "mine_radius", "mine_shape", "base_durability",
+                 "unbreaking_cost")
+
+    def __init__(self, tool, tool_def, version, upgrades=None,
+                 upgrade_defs=None, unbreaking_cost=4):
+        # version: the upgrades version this was built from; upgrades is
+        # only passed for tools the upgrades apply to
+        self.tool            = tool
+        self.version         = version
+        self.label           = tool_def["label"]
+        self.damage          = tool_def["damage"]
+        self.fortune_mult    = tool_def["fortune_mult"]
+        self.mine_radius     = tool_def["mine_radius"]
+        self.mine_shape      = tool_def.get("mine_shape", "square")
+        self.base_durability = tool_def["base_durability"]
+        self.unbreaking_cost = unbreaking_cost
+        if upgrades is None:
+            return
+        effects = {k: d["effects"] for k, d in upgrade_defs.items()}
+        lv = upgrades["fortune"]
+        if lv > 0:
+            self.fortune_mult = effects["fortune"][lv - 1]
+        lv = upgrades["efficiency"]
+        if lv > 0:
+            self.damage = effects["efficiency"][lv - 1]
+        lv = upgrades["unbreaking"]
+        if lv > 0:
+            self.unbreaking_cost = effects["unbreaking"][lv - 1]
+
+
+# Area mining. A shape mask is the list of (drow, dcol) offsets a blast
+# covers around its origin; direction (drow, dcol) is one of the four unit
+# steps and orients line and cone. Masks are built once per argument set.
+SHAPES = ("square", "circle", "line", "cone")
+
+_masks = {}
+
+
+def shape_mask(shape, radius, direction=(1, 0)):
+    key = (shape, radius, direction)
+    mask = _masks.get(key)
+    if mask is not None:
+        return mask
+    r = radius
+    dr, dc = direction
+    if shape == "square":
+        mask = [(y, x) for y in range(-r, r + 1) for x in range(-r, r + 1)]
+    elif shape == "circle":
+        # r * (r + 1) rounds the edge, so radius 1 still covers 3x3
+        mask = [(y, x) for y in range(-r, r + 1) for x in range(-r, r + 1)
+                if y * y + x * x <= r * (r + 1)]
+    elif shape == "line":
+        mask = [(dr * k, dc * k) for k in range(r + 1)]
+    elif shape == "cone":
+        # widens by one block on each side every second step
+        mask = [(dr * k + dc * w, dc * k + dr * w)
+                for k in range(r + 1) for w in range(-(k // 2), k // 2 + 1)]
+    else:
+        raise ValueError(f"unknown blast shape {shape!r}")
+    _masks[key] = mask
+    return mask
+
+
+class Blast:
+    # One application of damage over a shape, centred on row, col.
+    __slots__ = ("row", "col", "shape", "radius", "damage", "direction")
+
+    def __init__(self, row, col, shape, radius, damage, direction=(1, 0)):
+        self.row       = row
+        self.col       = col
+        self.shape     = shape
+        self.radius    = radius
+        self.damage    = damage
+        self.direction = direction
+
+    def cells(self):
+        row, col = self.row, self.col
+        return [(row + y, col + x)
+                for y, x in shape_mask(self.shape, self.radius, self.direction)]
+
+
+class BlastResult:
+    #   broken  (row, col, name) of every block that broke, in order
+    #   yields  name -> how many of it broke
+    #   blasts  how many blasts ran, chained ones included
+    __slots__ = ("broken", "yields", "blasts")
+
+    def __init__(self):
+        self.broken = []
+        self.yields = {}
+        self.blasts = 0
+
+
+def run_blasts(world, blasts, chains=None, max_blasts=64):
+    # Runs blasts breadth first. chains maps a block name to the
+    # (shape, radius, damage) blast it sets off where it breaks; those
+    # queue behind the current wave, each position at most once, and the
+    # whole run stops after max_blasts.
+    result = BlastResult()
+    queue = deque(blasts)
+    fired = {(b.row, b.col) for b in queue}
+    names, yields = world.names, result.yields
+    while queue and result.blasts < max_blasts:
+        blast = queue.popleft()
+        result.blasts += 1
+        for row, col, tid in world.damage_area(blast.cells(), blast.damage):
+            name = names[tid]
+            result.broken.append((row, col, name))
+            yields[name] = yields.get(name, 0) + 1
+            spec = chains and chains.get(name)
+            if spec and (row, col) not in fired:
+                fired.add((row, col))
+                queue.append(Blast(row, col, *spec))
+    return result
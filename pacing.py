@@ -0,0 +1,145 @@
+import asyncio
+import sys
+import time
+
+import pygame
+
+
+class FrameScheduler:
+    # Paces the main loop. Busy frames run at target_fps. While the loop
+    # marks itself idle (nothing animating, nothing to redraw) frames drop
+    # to idle_fps, and the wait ends early as soon as input is queued.
+    # In the browser every wait is an asyncio.sleep so the page stays
+    # responsive, and an idle wait polls the queue every poll_interval;
+    # on desktop busy frames use the clock's own delay and idle ones
+    # block in pygame.event.wait.
+
+    def __init__(self, clock, target_fps=60, idle_fps=4, poll_interval=0.01):
+        self.clock = clock
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        self.poll_interval = poll_interval
+        self.idle = False
+        self.web  = sys.platform == "emscripten"
+        self.fps  = 0.0        # achieved frames per second, updated each second
+        self._last   = time.perf_counter()
+        self._since  = self._last
+        self._frames = 0
+
+    @property
+    def rate(self):
+        # the frame rate currently being aimed for
+        return self.idle_fps if self.idle else self.target_fps
+
+    async def next_frame(self):
+        # waits for the next frame slot and returns seconds since the last one
+        if self.idle:
+            await self._wait_for_input(1 / self.idle_fps)
+        elif self.web:
+            delay = self._last + 1 / self.target_fps - time.perf_counter()
+            await asyncio.sleep(max(0.0, delay))
+        else:
+            self.clock.tick(self.target_fps)
+
+        now = time.perf_counter()
+        dt = now - self._last
+        self._last = now
+        self._frames += 1
+        if now - self._since >= 1.0:
+            self.fps = self._frames / (now - self._since)
+            self._since, self._frames = now, 0
+        return dt
+
+    async def _wait_for_input(self, timeout):
+        if not self.web:
+            # block in SDL until something arrives; wait() takes the event
+            # off the queue, so it goes back on for the loop to read
+            if not pygame.event.peek():
+                ev = pygame.event.wait(max(1, int(timeout * 1000)))
+                if ev.type != pygame.NOEVENT:
+                    pygame.event.post(ev)
+            return
+        deadline = time.perf_counter() + timeout
+        while not pygame.event.peek():
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                break
+            await asyncio.sleep(min(self.poll_interval, left))
+
+
+class ResolutionScaler:
+    # Picks the world render scale from how long frames take to build
+    # (input to flip, not the wait for the next frame slot). A sustained
+    # overrun of budget seconds drops one level. How much that drop saved
+    # is measured once the new level settles: a level that saves nothing
+    # is left at once and not used again, otherwise the scale only steps
+    # back up when the average plus that saving would still fit. A step up
+    # that has to be undone straight away doubles the wait for the next.
+    # Each scale must give whole pixels for the block size. Upscaling the
+    # world target has a fixed cost, so in benchmarks a 75% target costs
+    # more than a full one and only halving pays.
+
+    def __init__(self, budget, scales=(1.0, 0.5), down_after=20,
+                 up_after=180, settle=30, smoothing=0.1, max_up_after=3600):
+        self.budget = budget
+        self.scales = scales
+        self.down_after = down_after
+        self.up_after = up_after
+        self.max_up_after = max_up_after
+        self.settle = settle        # frames ignored after a change (cold caches)
+        self.smoothing = smoothing
+        self.level = 0
+        self.lowest = len(scales) - 1   # deepest level still worth using
+        self.saved = {}             # level -> seconds per frame it saves
+        self._above = None          # average at the level just left, until measured
+        self._probing = False       # last change was a step up
+        self._restart()
+
+    @property
+    def scale(self):
+        return self.scales[self.level]
+
+    def _restart(self):
+        self.avg = None
+        self._frames = 0
+        self._over = self._under = 0
+        self._skip = self.settle
+
+    def update(self, work):
+        # work: seconds this frame took; returns the scale for the next one
+        if self._skip:
+            self._skip -= 1
+            return self.scale
+        a = self.smoothing
+        self.avg = work if self.avg is None else self.avg + a * (work - self.avg)
+        self._frames += 1
+        if self._above is not None and self._frames == self.down_after:
+            self.saved[self.level] = self._above - self.avg
+            self._above = None
+            if self.saved[self.level] <= 0:
+                self.lowest = self.level = self.level - 1
+                self._restart()
+                return self.scale
+
+        saved = self.saved.get(self.level) if self.level else None
+        if self.avg > self.budget:
+            self._over, self._under = self._over + 1, 0
+        elif saved is not None and self.avg + saved < 0.85 * self.budget:
+            self._over, self._under = 0, self._under + 1
+        else:
+            self._over = self._under = 0
+            self._probing = False
+
+        if self._over >= self.down_after and self.level < self.lowest:
+            if self._probing:
+                self.up_after = min(2 * self.up_after, self.max_up_after)
+            self._above = self.avg
+            self.level += 1
+            self._probing = False
+            self._restart()
+        elif self._under >= self.up_after:
+            self.level -= 1
+            self._above = None
+            self._probing = True
+            self._restart()
+        return self.scale
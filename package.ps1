@@ -14,6 +14,9 @@ and the assets directory; adjust the command-line flags below as needed.
 # make sure we're in the repo root
 Push-Location -Path $PSScriptRoot
 
+# prebuild the texture atlas so the web build loads one image at startup
+python assets.py
+
 pygbag --build . `
     --package requirements.txt `
     --title "Digging In Paris" `
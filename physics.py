@@ -0,0 +1,76 @@
+import math
+
+# keeps a box edge that sits exactly on a tile boundary out of that tile
+EPS = 1e-6
+
+
+def _span(lo, hi, origin, size):
+    # tile indices covered by the half-open interval [lo, hi)
+    return range(math.floor((lo - origin) / size),
+                 math.floor((hi - EPS - origin) / size) + 1)
+
+
+def sweep_x(world, left, top, right, bottom, dx):
+    # Move the box [left, right) x [top, bottom) by dx, stopping at the
+    # first solid column it would cross. Only the columns between the
+    # leading edge and its target are looked at. Returns (dx, hit).
+    bs, wtop = world.block_size, world.top
+    rows = _span(top, bottom, wtop, bs)
+    if dx > 0:
+        first = math.floor((right - EPS) / bs) + 1
+        last  = math.floor((right + dx - EPS) / bs)
+        for col in range(first, last + 1):
+            for row in rows:
+                if world.solid(row, col):
+                    return col * bs - right, True
+    elif dx < 0:
+        first = math.floor(left / bs) - 1
+        last  = math.floor((left + dx) / bs)
+        for col in range(first, last - 1, -1):
+            for row in rows:
+                if world.solid(row, col):
+                    return (col + 1) * bs - left, True
+    return dx, False
+
+
+def sweep_y(world, left, top, right, bottom, dy):
+    bs, wtop = world.block_size, world.top
+    cols = _span(left, right, 0, bs)
+    if dy > 0:
+        first = math.floor((bottom - EPS - wtop) / bs) + 1
+        last  = math.floor((bottom + dy - EPS - wtop) / bs)
+        for row in range(first, last + 1):
+            for col in cols:
+                if world.solid(row, col):
+                    return wtop + row * bs - bottom, True
+    elif dy < 0:
+        first = math.floor((top - wtop) / bs) - 1
+        last  = math.floor((top + dy - wtop) / bs)
+        for row in range(first, last - 1, -1):
+            for col in cols:
+                if world.solid(row, col):
+                    return wtop + (row + 1) * bs - top, True
+    return dy, False
+
+
+def step(world, player_pos, vvel, move_x, dt, gravity, hitbox,
+         min_x, max_x):
+    # One fixed physics tick: integrate, then resolve x and y separately
+    # with swept boxes so no speed or frame rate can tunnel through tiles.
+    inset_x, inset_top, w, h = hitbox
+    vvel += gravity * dt
+
+    left = player_pos.x + inset_x
+    top  = player_pos.y + inset_top
+    dx, _ = sweep_x(world, left, top, left + w, top + h, move_x * dt)
+    player_pos.x = min(max(player_pos.x + dx, min_x), max_x)
+
+    left = player_pos.x + inset_x
+    dy, hit = sweep_y(world, left, top, left + w, top + h, vvel * dt)
+    player_pos.y += dy
+
+    on_ground = False
+    if hit:
+        on_ground = vvel > 0
+        vvel = 0.0
+    return player_pos, vvel, on_ground
@@ -0,0 +1,170 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+# frame-time histogram bucket edges in ms; the last bucket is open-ended
+HIST_EDGES = (4, 8, 12, 16.7, 25, 33.3, 50)
+
+PHASE_COLORS = [
+    (90, 170, 255), (255, 170, 60), (120, 220, 120), (230, 90, 90),
+    (200, 120, 230), (240, 220, 90), (90, 220, 220), (200, 200, 200),
+    (255, 120, 180), (150, 110, 70), (160, 160, 255), (120, 255, 200),
+]
+
+
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class FrameProfiler:
+    # Opt-in per-phase frame timings. The game loop calls begin() once per
+    # frame, mark(name) after each phase and end() after the flip; every
+    # call returns straight away while the profiler is off.
+
+    def __init__(self, window=240, refresh=15):
+        self.enabled = False
+        self.window  = window
+        self.refresh = refresh        # rebuild the overlay every N frames
+        self.phases  = []             # phase names in first-seen order
+        self.frames  = deque(maxlen=window)   # (total_ms, {phase: ms})
+        self.current = {}
+        self._start  = 0.0
+        self._last   = 0.0
+        self._panel  = None
+        self._age    = 0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frames.clear()
+        self._panel = None
+        # toggling happens mid-frame; start timing this frame from here
+        self._start = self._last = time.perf_counter()
+        self.current = {}
+
+    def begin(self):
+        if not self.enabled:
+            return
+        self._start = self._last = time.perf_counter()
+        self.current = {}
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def end(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        for name in self.current:
+            if name not in self.phases:
+                self.phases.append(name)
+        self.frames.append(((now - self._start) * 1000, self.current))
+
+    def stats(self):
+        # name -> (mean, p95, max) in ms over the rolling window
+        out = {}
+        if not self.frames:
+            return out
+        series = {"frame": [total for total, _ in self.frames]}
+        for name in self.phases:
+            series[name] = [ph.get(name, 0.0) for _, ph in self.frames]
+        for name, values in series.items():
+            out[name] = (sum(values) / len(values), _p95(values), max(values))
+        return out
+
+    def histogram(self):
+        counts = [0] * (len(HIST_EDGES) + 1)
+        for total, _ in self.frames:
+            i = 0
+            while i < len(HIST_EDGES) and total >= HIST_EDGES[i]:
+                i += 1
+            counts[i] += 1
+        return counts
+
+    def dump(self, path):
+        # .json gets the summary plus every frame; anything else is CSV
+        if path.endswith(".json"):
+            data = {
+                "phases": self.phases,
+                "stats": {k: dict(zip(("mean_ms", "p95_ms", "max_ms"), v))
+                          for k, v in self.stats().items()},
+                "histogram": {"edges_ms": list(HIST_EDGES),
+                              "counts": self.histogram()},
+                "frames": [{"total_ms": total, **ph} for total, ph in self.frames],
+            }
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+            return
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["frame", "total_ms"] + self.phases)
+            for i, (total, ph) in enumerate(self.frames):
+                w.writerow([i, f"{total:.3f}"] +
+                           [f"{ph.get(n, 0.0):.3f}" for n in self.phases])
+
+    def _build_panel(self, font, status=""):
+        # the numbers change on every rebuild, so they are rendered straight
+        # from the font rather than churning the game's TextCache
+        gw, gh, scale = self.window, 100, 100 / 33.3
+        stats = self.stats()
+        rows  = ["frame"] + self.phases
+        line  = font.get_linesize()
+        w = gw + 260
+        h = max(gh + 40, line * (len(rows) + 2) + 10)
+        panel = pygame.Surface((w, h), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+
+        # stacked per-phase bars, newest frame on the right
+        base = gh + 5
+        x0 = gw - len(self.frames)
+        for i, (_, ph) in enumerate(self.frames):
+            y = base
+            for j, name in enumerate(self.phases):
+                bar = ph.get(name, 0.0) * scale
+                if bar >= 0.5:
+                    pygame.draw.line(panel, PHASE_COLORS[j % len(PHASE_COLORS)],
+                                     (x0 + i, y), (x0 + i, max(5, y - bar)))
+                y -= bar
+        for ms, color in ((16.7, (255, 255, 255)), (33.3, (255, 80, 80))):
+            y = base - ms * scale
+            pygame.draw.line(panel, color, (0, y), (gw, y))
+
+        # histogram under the graph
+        counts = self.histogram()
+        peak = max(counts) or 1
+        bw = gw // len(counts)
+        for i, n in enumerate(counts):
+            bh = 25 * n / peak
+            pygame.draw.rect(panel, (180, 180, 180),
+                             (i * bw + 1, h - 5 - bh, bw - 2, bh))
+
+        x = gw + 10
+        header = font.render("phase      mean   p95    max", True, (255, 255, 255))
+        panel.blit(header, (x, 5))
+        for i, name in enumerate(rows):
+            mean, p95, peak_ms = stats.get(name, (0.0, 0.0, 0.0))
+            color = ((255, 255, 255) if name == "frame" else
+                     PHASE_COLORS[self.phases.index(name) % len(PHASE_COLORS)])
+            text = f"{name[:9]:9} {mean:5.1f} {p95:5.1f} {peak_ms:5.1f}"
+            panel.blit(font.render(text, True, color), (x, 5 + line * (i + 1)))
+        if status:
+            panel.blit(font.render(status, True, (255, 255, 255)),
+                       (x, 5 + line * (len(rows) + 1)))
+        return panel
+
+    def draw(self, target, font, topleft, status=""):
+        # status: an extra line for the panel, e.g. achieved vs target fps
+        if not self.enabled or not self.frames:
+            return
+        self._age += 1
+        if self._panel is None or self._age >= self.refresh:
+            self._panel = self._build_panel(font, status)
+            self._age = 0
+        target.blit(self._panel, topleft)
@@ -0,0 +1,128 @@
+# Where the interesting tiles are. For every chunk the index keeps a count
+# and an occupancy bitset per tracked tile id, where bit n is slot n of the
+# chunk (row-major, like Chunk.tiles). Chunks are indexed as the world
+# generates or restores them and kept current through world.watchers, so a
+# query skips chunks by their counts and then only walks set bits.
+# Results are (row, col, name) tuples. version goes up with every change,
+# so whatever was drawn from a query can be kept until it moves.
+
+
+def _bits(b):
+    # slots of the set bits, lowest first
+    while b:
+        low = b & -b
+        yield low.bit_length() - 1
+        b ^= low
+
+
+class OreIndex:
+
+    def __init__(self, world, names):
+        self.world = world
+        self.tracked = {world.ids[n]: n for n in names}   # tile id -> name
+        self.bits   = {}   # chunk index -> {tile id: bitset}
+        self.counts = {}   # chunk index -> {tile id: count}
+        self.version = 0
+        world.chunk_watchers.append(self.index_chunk)
+        world.watchers.append(self.update)
+
+    def index_chunk(self, index, tiles):
+        raw = bytes(tiles)
+        bits = {}
+        for tid in self.tracked:
+            b, needle = 0, bytes((tid,))
+            i = raw.find(needle)
+            while i != -1:
+                b |= 1 << i
+                i = raw.find(needle, i + 1)
+            if b:
+                bits[tid] = b
+        self.bits[index] = bits
+        self.counts[index] = {tid: b.bit_count() for tid, b in bits.items()}
+        self.version += 1
+
+    def update(self, row, col):
+        world = self.world
+        index = row // world.chunk_rows
+        bits = self.bits.get(index)
+        if bits is None:
+            return   # indexed in full when first queried
+        bit = 1 << ((row % world.chunk_rows) * world.cols + col)
+        tid = world.tile(row, col)
+        old = next((t for t, b in bits.items() if b & bit), None)
+        if old == tid or (old is None and tid not in self.tracked):
+            return   # only the hp changed, or nothing tracked before or after
+        counts = self.counts[index]
+        if old is not None:
+            bits[old] &= ~bit
+            counts[old] -= 1
+            if not counts[old]:
+                del bits[old], counts[old]
+        if tid in self.tracked:
+            bits[tid] = bits.get(tid, 0) | bit
+            counts[tid] = counts.get(tid, 0) + 1
+        self.version += 1
+
+    def _chunk(self, index):
+        bits = self.bits.get(index)
+        if bits is None:
+            tiles = self.world.chunk(index).tiles   # may index it by generating
+            bits = self.bits.get(index)
+            if bits is None:
+                self.index_chunk(index, tiles)
+                bits = self.bits[index]
+        return bits
+
+    def _ids(self, names):
+        if isinstance(names, str):
+            names = (names,)
+        ids = self.world.ids
+        return [ids[n] for n in names if ids.get(n) in self.tracked]
+
+    def nearest(self, names, row, col, radius):
+        # the closest tracked tile of any of names within radius blocks
+        # (straight-line distance from row, col), or None
+        tids = self._ids(names)
+        cr, cols = self.world.chunk_rows, self.world.cols
+        best, best_d2 = None, radius * radius
+        first = max(0, row - radius) // cr
+        last  = (row + radius) // cr
+        home  = row // cr
+        for index in sorted(range(first, last + 1), key=lambda i: abs(i - home)):
+            top = index * cr
+            gap = max(top - row, row - (top + cr - 1), 0)
+            if gap * gap > best_d2:
+                continue
+            bits = self._chunk(index)
+            for tid in tids:
+                for slot in _bits(bits.get(tid, 0)):
+                    r, c = divmod(slot, cols)
+                    d2 = (top + r - row) ** 2 + (c - col) ** 2
+                    if d2 < best_d2 or (best is None and d2 == best_d2):
+                        best, best_d2 = (top + r, c, self.tracked[tid]), d2
+        return best
+
+    def in_rect(self, row0, col0, row1, col1, names=None):
+        # every tracked tile (of names, or all of them) with
+        # row0 <= row <= row1 and col0 <= col <= col1
+        cr, cols = self.world.chunk_rows, self.world.cols
+        row0, col0, col1 = max(0, row0), max(0, col0), min(cols - 1, col1)
+        if row1 < row0 or col1 < col0:
+            return []
+        tids = self._ids(names) if names is not None else list(self.tracked)
+        line = ((1 << (col1 - col0 + 1)) - 1) << col0
+        out = []
+        for index in range(row0 // cr, row1 // cr + 1):
+            counts = self.counts.get(index)
+            if counts is not None and not any(t in counts for t in tids):
+                continue
+            bits = self._chunk(index)
+            top = index * cr
+            mask = 0
+            for r in range(max(row0, top) - top, min(row1, top + cr - 1) - top + 1):
+                mask |= line << (r * cols)
+            for tid in tids:
+                for slot in _bits(bits.get(tid, 0) & mask):
+                    r, c = divmod(slot, cols)
+                    out.append((top + r, c, self.tracked[tid]))
+        return out
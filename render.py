@@ -0,0 +1,300 @@
+from collections import OrderedDict
+
+import pygame
+
+from world import AIR
+
+
+def draw_rounded_rect(surface, color, rect, radius=10,
+                      border_color=None, border_width=2):
+    pygame.draw.rect(surface, color, rect, border_radius=radius)
+    if border_color:
+        pygame.draw.rect(surface, border_color, rect, border_width,
+                         border_radius=radius)
+
+
+def build_damage_atlas(block_size, frames=16):
+    # One strip of pre-rendered crack overlays, tint and cracks baked
+    # together. Frame i stands for damage in [i/frames, (i+1)/frames).
+    atlas = pygame.Surface((block_size * frames, block_size), pygame.SRCALPHA)
+    out = []
+    for i in range(frames):
+        dmg_frac = (i + 0.5) / frames
+        x = i * block_size
+        atlas.fill((0, 0, 0, int(dmg_frac * 160)), (x, 0, block_size, block_size))
+        cx, cy2 = x + block_size // 2, block_size // 2
+        stages = int(dmg_frac * 4) + 1
+        pygame.draw.line(atlas, (180,160,120),
+                         (cx, cy2 - 20), (cx + 10, cy2 + 20), 2)
+        if stages >= 2:
+            pygame.draw.line(atlas, (180,160,120),
+                             (cx - 15, cy2 - 10), (cx + 5, cy2 + 15), 2)
+        if stages >= 3:
+            pygame.draw.line(atlas, (180,160,120),
+                             (cx + 8, cy2 - 25), (cx - 8, cy2 + 10), 2)
+            pygame.draw.line(atlas, (180,160,120),
+                             (cx - 20, cy2 + 5), (cx + 20, cy2 - 5), 1)
+        if stages >= 4:
+            pygame.draw.line(atlas, (200,170,130),
+                             (cx - 25, cy2 - 20), (cx + 25, cy2 + 25), 2)
+            pygame.draw.line(atlas, (200,170,130),
+                             (cx + 20, cy2 - 30), (cx - 15, cy2 + 30), 2)
+        out.append(atlas.subsurface((x, 0, block_size, block_size)))
+    return out
+
+
+class TerrainCache:
+    # Terrain is pre-rendered into full-width strips of strip_rows rows.
+    # The world reports every changed tile, only those tiles are repainted,
+    # and a frame is then a couple of strip blits instead of one per tile.
+    # At a render scale below 1 the strips are built from scaled copies of
+    # the tiles and draw() takes the camera in scaled pixels.
+
+    def __init__(self, world, tile_imgs, damage_frames, strip_rows=4,
+                 max_strips=8, background=(20, 12, 8)):
+        self.world = world
+        self.tile_imgs = tile_imgs
+        self.damage_frames = damage_frames
+        self.strip_rows = strip_rows
+        self.max_strips = max_strips
+        self.background = background
+
+        self.strips = OrderedDict()   # strip index -> Surface, LRU order
+        self.dirty  = {}              # strip index -> {(row, col), ...}
+        self.scale  = None
+        self.set_scale(1.0)
+        world.watchers.append(self.invalidate)
+
+    def set_scale(self, scale):
+        if scale == self.scale:
+            return
+        self.scale = scale
+        self.block_size = round(self.world.block_size * scale)
+        self.top = round(self.world.top * scale)
+        self.strip_h = self.strip_rows * self.block_size
+        self.clear()
+
+    def invalidate(self, row, col):
+        index = row // self.strip_rows
+        if index in self.strips:
+            self.dirty.setdefault(index, set()).add((row, col))
+
+    def clear(self):
+        # drop every strip, e.g. once tile images have been swapped
+        self.strips.clear()
+        self.dirty.clear()
+        self._scaled = None
+
+    def _images(self):
+        # (tile images, damage frames) at the current scale
+        if self.scale == 1.0:
+            return self.tile_imgs, self.damage_frames
+        if self._scaled is None:
+            size = (self.block_size, self.block_size)
+            self._scaled = (
+                [img and pygame.transform.smoothscale(img, size)
+                 for img in self.tile_imgs],
+                [pygame.transform.smoothscale(f, size) for f in self.damage_frames])
+        return self._scaled
+
+    def _paint(self, surf, row, col):
+        bs = self.block_size
+        x, y = col * bs, (row % self.strip_rows) * bs
+        surf.fill(self.background, (x, y, bs, bs))
+        tid = self.world.tile(row, col)
+        if tid == AIR:
+            return
+        tile_imgs, frames = self._images()
+        img = tile_imgs[tid]
+        if img:
+            surf.blit(img, (x, y))
+        hp, mhp = self.world.hp_at(row, col), self.world.max_hp[tid]
+        if hp < mhp:
+            i = min(len(frames) - 1, int((1.0 - hp / mhp) * len(frames)))
+            surf.blit(frames[i], (x, y))
+
+    def strip(self, index):
+        surf = self.strips.get(index)
+        if surf is None:
+            surf = pygame.Surface(
+                (self.world.cols * self.block_size, self.strip_h)).convert()
+            first = index * self.strip_rows
+            for row in range(first, first + self.strip_rows):
+                for col in range(self.world.cols):
+                    self._paint(surf, row, col)
+            self.strips[index] = surf
+            if len(self.strips) > self.max_strips:
+                old, _ = self.strips.popitem(last=False)
+                self.dirty.pop(old, None)
+        else:
+            self.strips.move_to_end(index)
+            for row, col in self.dirty.pop(index, ()):
+                self._paint(surf, row, col)
+        return surf
+
+    def draw(self, target, camera_y):
+        view_h = target.get_height()
+        top, bs = self.top, self.block_size
+        rows = range(max(0, (camera_y - top) // bs),
+                     (camera_y + view_h - 1 - top) // bs + 1)
+        if not rows:
+            return
+        for index in range(rows[0] // self.strip_rows,
+                           rows[-1] // self.strip_rows + 1):
+            strip_y = top + index * self.strip_h - camera_y
+            clip_top = max(0, -strip_y)
+            clip_bot = min(self.strip_h, view_h - strip_y)
+            if clip_bot <= clip_top:
+                continue
+            target.blit(self.strip(index), (0, strip_y + clip_top),
+                        (0, clip_top, target.get_width(), clip_bot - clip_top))
+
+
+class SpriteRegistry:
+    # Character frames per skin, with every (skin, facing, frame) variant
+    # built once on first use. Sources face right; facing -1 is mirrored.
+    # Skins that aren't registered yet fall back to fallback_skin.
+
+    def __init__(self, fallback_skin="default"):
+        self.fallback_skin = fallback_skin
+        self.frames   = {}   # skin -> [Surface, ...] facing right
+        self.variants = {}   # (skin, facing, frame) -> Surface
+
+    def register(self, skin, frames):
+        self.frames[skin] = list(frames)
+        for key in [k for k in self.variants if k[0] == skin]:
+            del self.variants[key]
+
+    def get(self, skin, facing=1, frame=0):
+        key = (skin, facing, frame)
+        surf = self.variants.get(key)
+        if surf is None:
+            frames = self.frames.get(skin) or self.frames[self.fallback_skin]
+            surf = frames[frame % len(frames)]
+            if facing < 0:
+                surf = pygame.transform.flip(surf, True, False)
+            self.variants[key] = surf
+        return surf
+
+
+class FogLayer:
+    # The radial light mask is rasterised once per radius and kept in a
+    # small LRU. Each frame the reused fog surface only has the previous
+    # hole filled back in before the mask is min-blended at the new spot.
+
+    def __init__(self, darkness=220, max_masks=4):
+        self.darkness = darkness
+        self.max_masks = max_masks
+        self.masks = OrderedDict()   # radius -> Surface, LRU order
+        self.frame = None
+        self._hole = None
+
+    def mask(self, radius):
+        m = self.masks.get(radius)
+        if m is None:
+            size = 2 * radius + 2
+            m = pygame.Surface((size, size), pygame.SRCALPHA)
+            m.fill((0, 0, 0, self.darkness))
+            c = (radius + 1, radius + 1)
+            for r in range(radius, 0, -4):
+                alpha = int(self.darkness * (r / radius) ** 2)
+                pygame.draw.circle(m, (0, 0, 0, alpha), c, r)
+            pygame.draw.circle(m, (0, 0, 0, 0), c, radius // 3)
+            self.masks[radius] = m
+            if len(self.masks) > self.max_masks:
+                self.masks.popitem(last=False)
+        else:
+            self.masks.move_to_end(radius)
+        return m
+
+    def draw(self, target, center, radius):
+        if self.frame is None or self.frame.get_size() != target.get_size():
+            self.frame = pygame.Surface(target.get_size(), pygame.SRCALPHA)
+            self.frame.fill((0, 0, 0, self.darkness))
+            self._hole = None
+        if self._hole:
+            self.frame.fill((0, 0, 0, self.darkness), self._hole)
+        m = self.mask(radius)
+        self._hole = self.frame.blit(
+            m, (center[0] - radius - 1, center[1] - radius - 1),
+            special_flags=pygame.BLEND_RGBA_MIN)
+        target.blit(self.frame, (0, 0))
+
+
+class TextCache:
+    # Rendered text surfaces keyed by (font, text, color, antialias), so
+    # labels that didn't change since last frame are never re-rasterised.
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.entries[key] = surf
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surf
+
+
+class Viewport:
+    # The game draws at a fixed logical size. While the window is that size
+    # the display surface is the canvas; otherwise frames go to an offscreen
+    # canvas that present() scales into the window, letterboxed to keep the
+    # aspect ratio, and mouse positions are mapped back to canvas pixels.
+
+    MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.rect = pygame.Rect((0, 0), self.size)   # canvas area in the window
+        self.window = None
+        self.canvas = None
+        self._offscreen = None
+        self._dest = None    # window subsurface present() scales into
+        self.sync()
+
+    def sync(self):
+        # call once the window has changed size
+        self.window = pygame.display.get_surface()
+        ww, wh = self.window.get_size()
+        w, h = self.size
+        if (ww, wh) == self.size:
+            self.rect = pygame.Rect((0, 0), self.size)
+            self.canvas, self._dest = self.window, None
+            return
+        if self._offscreen is None:
+            self._offscreen = pygame.Surface(self.size).convert()
+        self.canvas, self._dest = self._offscreen, None
+        if not (ww and wh):   # minimised
+            return
+        k = min(ww / w, wh / h)
+        sw, sh = max(1, round(w * k)), max(1, round(h * k))
+        self.rect = pygame.Rect((ww - sw) // 2, (wh - sh) // 2, sw, sh)
+        self.window.fill((0, 0, 0))
+        self._dest = self.window.subsurface(self.rect)
+
+    def present(self):
+        if self._dest is not None:
+            pygame.transform.scale(self.canvas, self.rect.size, self._dest)
+        pygame.display.flip()
+
+    def to_logical(self, pos):
+        r = self.rect
+        return ((pos[0] - r.x) * self.size[0] // r.w,
+                (pos[1] - r.y) * self.size[1] // r.h)
+
+    def map_events(self, events):
+        if self.canvas is self.window:
+            return events
+        return [pygame.event.Event(e.type, {**e.dict, "pos": self.to_logical(e.pos)})
+                if e.type in self.MOUSE_EVENTS else e for e in events]
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import atexit
+import os
+import struct
+import time
+import zlib
+
+import pygame
+
+from controls import HeldKeys, LiveInput, ScriptedInput
+from profiler import FrameProfiler
+
+# Replay log layout: a plain header, then one zlib stream of frames.
+#
+#   header: MAGIC, u8 version, u64 seed
+#   frame:  f64 dt, u16 held-key mask, u8 event count, events...
+#   event:  u8 kind, then kind-specific fields (see EVENT_FIELDS)
+#
+# Held keys are stored as a bitmask over KEYS, the only keys the game reads
+# through get_pressed(); everything else arrives as KEYDOWN events.
+
+MAGIC   = b"DIPR"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBQ")
+FRAME  = struct.Struct("<dHB")
+
+KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_SPACE,
+        pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+# kind -> (pygame event type, struct of its fields, attribute names)
+EVENT_FIELDS = {
+    1: (pygame.KEYDOWN,         struct.Struct("<i"),   ("key",)),
+    2: (pygame.MOUSEBUTTONDOWN, struct.Struct("<Bhh"), ("button", "x", "y")),
+    3: (pygame.MOUSEMOTION,     struct.Struct("<hh"),  ("x", "y")),
+    4: (pygame.QUIT,            struct.Struct("<"),    ()),
+}
+EVENT_KINDS = {etype: kind for kind, (etype, _, _) in EVENT_FIELDS.items()}
+
+# flush the compressed stream this often so a crash keeps most of the log
+FLUSH_FRAMES = 600
+
+
+def encode_frame(dt, keys, events):
+    mask = 0
+    for bit, key in enumerate(KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    body = []
+    for event in events:
+        kind = EVENT_KINDS.get(event.type)
+        if kind is None:
+            continue
+        _, fields, names = EVENT_FIELDS[kind]
+        values = []
+        for name in names:
+            if name in ("x", "y"):
+                values.append(event.pos[name == "y"])
+            else:
+                values.append(getattr(event, name))
+        body.append(bytes((kind,)) + fields.pack(*values))
+    return FRAME.pack(dt, mask, len(body)) + b"".join(body)
+
+
+def decode_frames(data):
+    # a log cut short by a crash decodes up to its last whole frame
+    frames, dts = [], []
+    pos = 0
+    while pos < len(data):
+        try:
+            dt, mask, count = FRAME.unpack_from(data, pos)
+            end = pos + FRAME.size
+            events = []
+            for _ in range(count):
+                etype, fields, names = EVENT_FIELDS[data[end]]
+                values = dict(zip(names, fields.unpack_from(data, end + 1)))
+                end += 1 + fields.size
+                if "x" in values:
+                    values["pos"] = (values.pop("x"), values.pop("y"))
+                events.append(pygame.event.Event(etype, values))
+        except (struct.error, IndexError, KeyError):
+            break
+        pos = end
+        held = [key for bit, key in enumerate(KEYS) if mask >> bit & 1]
+        frames.append((HeldKeys(held), events))
+        dts.append(dt)
+    return frames, dts
+
+
+class RecordingInput:
+    # Wraps another input source and logs every frame it hands out, plus
+    # the frame time, so the run can be replayed exactly.
+
+    def __init__(self, source, path, seed):
+        self.source = source
+        self.file   = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed))
+        self.zip    = zlib.compressobj(9)
+        self.frames = 0
+        self._keys, self._events = None, ()
+        atexit.register(self.close)
+
+    def poll(self):
+        self._keys, self._events = self.source.poll()
+        return self._keys, self._events
+
+    def frame_dt(self, dt):
+        # called once per frame after poll(); this is where the frame is logged
+        dt = self.source.frame_dt(dt)
+        if self.file is None:
+            return dt
+        self.file.write(self.zip.compress(encode_frame(dt, self._keys, self._events)))
+        self.frames += 1
+        if self.frames % FLUSH_FRAMES == 0:
+            self.file.write(self.zip.flush(zlib.Z_SYNC_FLUSH))
+            self.file.flush()
+        return dt
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.write(self.zip.flush())
+        self.file.close()
+        self.file = None
+
+
+class ReplayInput(ScriptedInput):
+    # Plays a recorded log back, frame times included.
+
+    def __init__(self, frames, dts, seed):
+        super().__init__(frames)
+        self.dts  = dts
+        self.seed = seed
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, seed = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} replay log")
+            data = zlib.decompressobj().decompress(f.read())
+        return cls(*decode_frames(data), seed)
+
+    def frame_dt(self, dt):
+        return self.dts[self.frame - 1] if 0 < self.frame <= len(self.dts) else dt
+
+
+def record(path, seed=None):
+    import main
+    game = main.digging(seed=seed)
+    game.input = RecordingInput(LiveInput(game.viewport), path, game.seed)
+    try:
+        asyncio.run(game.main())
+    finally:
+        game.input.close()
+        pygame.quit()
+
+
+def play(path, headless=True, profile=None):
+    # Runs the log as fast as possible; the recorded frame times drive the
+    # simulation, so the outcome does not depend on how fast this machine is.
+    import main
+    replay = ReplayInput.load(path)
+    game = main.digging(seed=replay.seed, headless=headless, input_source=replay)
+    if profile:
+        # keep every frame of the run rather than the usual rolling window
+        game.profiler = FrameProfiler(window=max(1, len(replay.frames)))
+        game.profiler.toggle()
+    t0 = time.perf_counter()
+    asyncio.run(game.main(frames=len(replay.frames), fixed_dt=0.0))
+    elapsed = time.perf_counter() - t0
+    if profile:
+        game.profiler.dump(profile)
+    return game, elapsed
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Record or replay a play session")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("path")
+    rec.add_argument("--seed", type=int)
+    rep = sub.add_parser("play")
+    rep.add_argument("path")
+    rep.add_argument("--window", action="store_true",
+                     help="show the replay instead of running headless")
+    rep.add_argument("--profile", metavar="CSV_OR_JSON",
+                     help="write per-phase frame timings for the replay")
+    args = ap.parse_args()
+
+    if args.cmd == "record":
+        record(args.path, args.seed)
+    else:
+        if not args.window:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        game, elapsed = play(args.path, not args.window, args.profile)
+        frames = game.input.frame
+        print(f"{frames} frames in {elapsed:.2f}s "
+              f"({elapsed / max(1, frames) * 1000:.2f} ms/frame)")
@@ -0,0 +1,262 @@
+import base64
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+# Save file layout: a header, then a log of records that is only ever
+# appended to. Records after the last COMMIT belong to a save that was cut
+# short and are ignored, so a crash mid-write loses that save, not the file.
+#
+#   header: MAGIC, u8 version, u64 seed, u16 cols, u16 chunk_rows,
+#           u8 name count, then each tile name as u8 length + utf-8
+#   record: u8 kind, u32 payload length, payload
+#     CHUNK   u32 index, zlib(tiles, u16 delta count, (u16 slot, u16 hp)...)
+#     STATE   utf-8 JSON of the player and inventory state
+#     COMMIT  empty; everything before it is one consistent save
+#
+# Only chunks that differ from what the seed generates are stored, and a
+# chunk's HP table only lists blocks that have taken damage. Later records
+# for the same chunk replace earlier ones.
+
+MAGIC   = b"DIPS"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBQHH")
+RECORD = struct.Struct("<BI")
+
+CHUNK, STATE, COMMIT = 1, 2, 3
+
+# once the log is this many times the size of the last full save, the next
+# save rewrites it from scratch
+COMPACT_RATIO = 4
+
+
+class SaveError(Exception):
+    pass
+
+
+def encode_header(seed, cols, chunk_rows, names):
+    out = [HEADER.pack(MAGIC, VERSION, seed, cols, chunk_rows), bytes((len(names),))]
+    for name in names:
+        raw = name.encode()
+        out.append(bytes((len(raw),)) + raw)
+    return b"".join(out)
+
+
+def _record(kind, payload=b""):
+    return RECORD.pack(kind, len(payload)) + payload
+
+
+def encode_chunk(index, tiles, hp, fresh_hp):
+    deltas = array("H")
+    for slot, (tid, value) in enumerate(zip(tiles, hp)):
+        if value != fresh_hp[tid]:
+            deltas.extend((slot, value))
+    body = bytes(tiles) + struct.pack("<H", len(deltas) // 2) + deltas.tobytes()
+    return _record(CHUNK, struct.pack("<I", index) + zlib.compress(body))
+
+
+def encode_state(state):
+    return _record(STATE, json.dumps(state, separators=(",", ":")).encode())
+
+
+def encode_commit():
+    return _record(COMMIT)
+
+
+class Snapshot:
+    # Everything read back from a save: the seed, the world layout it was
+    # written with, saved chunks as {index: (tiles, hp_deltas)} and the
+    # latest state dict.
+
+    def __init__(self, seed, cols, chunk_rows, names):
+        self.seed = seed
+        self.cols = cols
+        self.chunk_rows = chunk_rows
+        self.names  = names
+        self.chunks = {}
+        self.state  = None
+
+    def apply(self, world):
+        # tile ids are remapped by name, so adding a block type later
+        # doesn't scramble old saves; unknown names become air
+        if (self.cols, self.chunk_rows) != (world.cols, world.chunk_rows):
+            raise SaveError("save was written for a different world layout")
+        remap = bytes(world.ids.get(n, 0) for n in self.names).ljust(256, b"\0")
+        fresh = world._fresh_hp
+        for index, (tiles, deltas) in self.chunks.items():
+            tiles = tiles.translate(remap)
+            hp = array("H", map(fresh.__getitem__, tiles))
+            for slot, value in zip(deltas[::2], deltas[1::2]):
+                hp[slot] = value
+            world.restore(index, tiles, hp)
+        world.rebuild_surface()
+
+
+def read(data):
+    try:
+        return _read(data)
+    except (struct.error, zlib.error, IndexError, ValueError) as e:
+        raise SaveError(f"save is corrupt: {e}") from None
+
+
+def _read(data):
+    if len(data) < HEADER.size + 1:
+        raise SaveError("save is truncated")
+    magic, version, seed, cols, chunk_rows = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveError("not a save file")
+    if version != VERSION:
+        raise SaveError(f"unsupported save version {version}")
+    pos = HEADER.size
+    names = []
+    for _ in range(data[pos]):
+        n = data[pos + 1]
+        names.append(data[pos + 2:pos + 2 + n].decode())
+        pos += 1 + n
+    pos += 1
+
+    snap = Snapshot(seed, cols, chunk_rows, names)
+    chunks, state = {}, None
+    while pos + RECORD.size <= len(data):
+        kind, length = RECORD.unpack_from(data, pos)
+        payload = data[pos + RECORD.size:pos + RECORD.size + length]
+        if len(payload) < length:
+            break
+        pos += RECORD.size + length
+        if kind == CHUNK:
+            (index,) = struct.unpack_from("<I", payload)
+            body = zlib.decompress(payload[4:])
+            size = cols * chunk_rows
+            (count,) = struct.unpack_from("<H", body, size)
+            deltas = array("H")
+            deltas.frombytes(body[size + 2:size + 2 + count * 4])
+            chunks[index] = (body[:size], deltas)
+        elif kind == STATE:
+            state = json.loads(payload)
+        elif kind == COMMIT:
+            snap.chunks.update(chunks)
+            chunks = {}
+            if state is not None:
+                snap.state = state
+    return snap
+
+
+class FileStore:
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def append(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+
+    def replace(self, data):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+
+class BrowserStore:
+    # pygbag's file system lives in memory and is gone on reload, so in the
+    # browser the log is kept in localStorage as numbered base64 segments;
+    # appending adds a segment rather than rewriting the whole save.
+
+    def __init__(self, prefix="digging-save"):
+        import platform as host   # pygbag's module exposing the JS window
+        self.storage = host.window.localStorage
+        self.prefix = prefix
+
+    def _count(self):
+        return int(self.storage.getItem(f"{self.prefix}.n") or 0)
+
+    def read(self):
+        n = self._count()
+        if not n:
+            return None
+        return b"".join(base64.b64decode(self.storage.getItem(f"{self.prefix}.{i}"))
+                        for i in range(n))
+
+    def append(self, data):
+        n = self._count()
+        self.storage.setItem(f"{self.prefix}.{n}", base64.b64encode(data).decode())
+        self.storage.setItem(f"{self.prefix}.n", str(n + 1))
+
+    def replace(self, data):
+        for i in range(self._count()):
+            self.storage.removeItem(f"{self.prefix}.{i}")
+        self.storage.setItem(f"{self.prefix}.0", base64.b64encode(data).decode())
+        self.storage.setItem(f"{self.prefix}.n", "1")
+
+    def size(self):
+        return sum(len(self.storage.getItem(f"{self.prefix}.{i}") or "") * 3 // 4
+                   for i in range(self._count()))
+
+
+def default_store(path="savegame.dips"):
+    if sys.platform == "emscripten":
+        return BrowserStore()
+    return FileStore(path)
+
+
+class SaveFile:
+    # Writes a world and its state to a store: a full save the first time,
+    # then appends only the chunks changed since the previous save.
+
+    def __init__(self, store):
+        self.store = store
+        self.started = False
+        self.full_size = 0
+
+    def load(self):
+        data = self.store.read()
+        if not data:
+            return None
+        return read(data)
+
+    def _chunks(self, world, indices):
+        out = []
+        for index in indices:
+            saved = world.export(index)
+            if saved is not None:
+                out.append(encode_chunk(index, *saved, world._fresh_hp))
+        return out
+
+    def save_full(self, seed, world, state):
+        parts = [encode_header(seed, world.cols, world.chunk_rows, world.names)]
+        parts += self._chunks(world, world.modified_chunks())
+        parts += [encode_state(state), encode_commit()]
+        data = b"".join(parts)
+        self.store.replace(data)
+        world.unsaved.clear()
+        self.started = True
+        self.full_size = len(data)
+
+    def save(self, seed, world, state):
+        # incremental: a handful of small records, cheap enough to run
+        # between frames; the first call (or an oversized log) writes in full
+        if not self.started or self.store.size() > COMPACT_RATIO * max(self.full_size, 1024):
+            self.save_full(seed, world, state)
+            return
+        parts = self._chunks(world, sorted(world.unsaved))
+        parts += [encode_state(state), encode_commit()]
+        self.store.append(b"".join(parts))
+        world.unsaved.clear()
@@ -0,0 +1,445 @@
+import pygame
+
+from render import draw_rounded_rect
+
+SHOP_TABS = [
+    ("sell",     "Sell Blocks"),
+    ("upgrades", "Upgrades"),
+    ("tools",    "Tools"),
+    ("skins",    "Skins"),
+]
+
+SELL_ORES  = ["soil", "stone", "copper", "gold", "diamond", "ruby"]
+SHOP_TOOLS = ["pickaxe", "dynamite", "radar", "drill"]
+UPGRADES   = ["fortune", "efficiency", "unbreaking"]
+
+
+def _lighten(color, amount=22):
+    return tuple(min(255, v + amount) for v in color)
+
+
+class Button:
+    # a pre-rendered clickable; action is None for disabled buttons
+    __slots__ = ("rect", "image", "hover", "action")
+
+    def __init__(self, rect, image, hover, action):
+        self.rect   = rect
+        self.image  = image
+        self.hover  = hover
+        self.action = action
+
+
+def make_button(rect, fill, border, label, action=None,
+                radius=6, border_width=1):
+    rect = pygame.Rect(rect)
+
+    def face(fill, border):
+        surf = pygame.Surface(rect.size, pygame.SRCALPHA)
+        draw_rounded_rect(surf, fill, (0, 0, rect.w, rect.h), radius=radius,
+                          border_color=border, border_width=border_width)
+        surf.blit(label, ((rect.w - label.get_width())  // 2,
+                          (rect.h - label.get_height()) // 2))
+        return surf
+
+    hover = face(_lighten(fill), _lighten(border, 60)) if action else None
+    return Button(rect, face(fill, border), hover, action)
+
+
+class ShopScreen:
+    # Retained shop UI. The chrome of each tab (title, tab bar, panel) is
+    # rendered once; the tab contents are rebuilt into a cached frame only
+    # when the state they show changes. Hit testing runs on input events,
+    # and draw() does nothing at all while the shop is idle.
+
+    def __init__(self, game, size, ore_prices, tool_defs, upgrade_defs):
+        self.game = game
+        self.width, self.height = size
+        self.ore_prices   = ore_prices
+        self.tool_defs    = tool_defs
+        self.upgrade_defs = upgrade_defs
+        self.tab = "sell"
+        self.content_rect = pygame.Rect(60, 188, self.width - 120, self.height - 300)
+
+        self.chrome  = {}     # tab -> Surface
+        self.frame   = None
+        self.buttons = []
+        self.hovered = None
+        self.mouse   = (-1, -1)
+        self.dirty   = True
+        self._built_for   = None
+        self._flash_shown = False
+        self._preview     = None
+
+    def open(self, mouse=(-1, -1)):
+        # mouse: pointer position in screen coordinates
+        self.tab = "sell"
+        self.mouse = mouse
+        self.dirty = True
+
+    def invalidate(self):
+        self._built_for = None
+
+    def assets_changed(self):
+        # icons or skins were replaced; rebuild everything that drew them
+        self._preview = None
+        self._built_for = None
+
+    def _state_key(self):
+        g = self.game
+        return (self.tab, g.coins, g.inventory.version, g.owned_tools.version,
+                g.pickaxe_upgrades.version, g.dynamite_count, g.active_tool,
+                tuple(sorted(g.owned_skins)), g.equipped_skin)
+
+    # input
+
+    def _button_at(self, pos):
+        for b in self.buttons:
+            if b.action and b.rect.collidepoint(pos):
+                return b
+        return None
+
+    def _update_hover(self):
+        hovered = self._button_at(self.mouse)
+        if hovered is not self.hovered:
+            self.hovered = hovered
+            self.dirty = True
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEMOTION:
+            self.mouse = event.pos
+            self._update_hover()
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.mouse = event.pos
+            b = self._button_at(event.pos)
+            if b:
+                b.action()
+                self.dirty = True
+
+    def _select_tab(self, tab):
+        self.tab = tab
+
+    # building
+
+    def _tab_rects(self):
+        tab_y, tab_h, tab_w, gap = 126, 46, 155, 12
+        total_w = 4 * tab_w + 3 * gap
+        start_x = self.width // 2 - total_w // 2
+        return [(name, label, pygame.Rect(start_x + i * (tab_w + gap), tab_y, tab_w, tab_h))
+                for i, (name, label) in enumerate(SHOP_TABS)]
+
+    def _tab_face(self, label, rect, active, action=None):
+        g = self.game
+        txt = g.text.render(g.font_large, label,
+                            (255, 255, 255) if active else (140, 140, 150))
+        return make_button(rect,
+                           (55, 55, 62)  if active else (35, 35, 40),
+                           (255, 215, 0) if active else (90, 90, 100),
+                           txt, action, radius=8, border_width=2)
+
+    def _build_chrome(self, tab):
+        g = self.game
+        surf = pygame.Surface((self.width, self.height)).convert()
+        surf.fill((22, 22, 28))
+
+        title = g.text.render(g.font_title, "SHOP", (220, 220, 230))
+        surf.blit(title, (self.width // 2 - title.get_width() // 2, 14))
+
+        for name, label, rect in self._tab_rects():
+            surf.blit(self._tab_face(label, rect, name == tab).image, rect)
+
+        draw_rounded_rect(surf, (32, 32, 40), self.content_rect,
+                          radius=12, border_color=(60, 60, 72), border_width=2)
+
+        ex_w, ex_h = 220, 50
+        ex_x = self.width // 2 - ex_w // 2
+        ex_y = self.height - 72
+        draw_rounded_rect(surf, (55, 30, 30), (ex_x, ex_y, ex_w, ex_h),
+                          radius=8, border_color=(180, 70, 70), border_width=2)
+        el = g.text.render(g.font_large, "[ ESC ]  Exit", (220, 160, 160))
+        surf.blit(el, (ex_x + (ex_w - el.get_width())  // 2,
+                       ex_y + (ex_h - el.get_height()) // 2))
+        return surf
+
+    def _rebuild(self):
+        g = self.game
+        if self.tab not in self.chrome:
+            self.chrome[self.tab] = self._build_chrome(self.tab)
+        if self.frame is None:
+            self.frame = pygame.Surface((self.width, self.height)).convert()
+        surf = self.frame
+        surf.blit(self.chrome[self.tab], (0, 0))
+
+        coins_s = g.text.render(g.font_large, f"Coins: {g.coins}", (255, 215, 0))
+        surf.blit(coins_s, (self.width // 2 - coins_s.get_width() // 2, 78))
+
+        # inactive tabs are the only tab-bar widgets that react to the mouse
+        self.buttons = [
+            self._tab_face(label, rect, False,
+                           lambda name=name: self._select_tab(name))
+            for name, label, rect in self._tab_rects() if name != self.tab]
+
+        area = self.content_rect
+        if self.tab == "sell":
+            self._build_sell_tab(surf, area)
+        elif self.tab == "upgrades":
+            self._build_upgrades_tab(surf, area)
+        elif self.tab == "tools":
+            self._build_tools_tab(surf, area)
+        else:
+            self._build_skins_tab(surf, area)
+
+    def _add(self, button):
+        self.frame.blit(button.image, button.rect)
+        self.buttons.append(button)
+
+    def _build_sell_tab(self, surf, area):
+        g = self.game
+        cols   = 3
+        row_h  = 88
+        col_w  = (area.width - 40) // cols
+        sx, sy = area.x + 20, area.y + 16
+
+        for i, ore in enumerate(SELL_ORES):
+            ci = i % cols
+            ri = i // cols
+            rx = sx + ci * col_w
+            ry = sy + ri * row_h
+
+            row_rect = pygame.Rect(rx, ry, col_w - 10, row_h - 8)
+            draw_rounded_rect(surf, (42, 42, 52), row_rect,
+                              radius=8, border_color=(60, 60, 72), border_width=1)
+
+            surf.blit(g.shop_icons[ore], (rx + 8, ry + (row_h-8-48)//2))
+
+            name_s  = g.text.render(g.font_med, ore.capitalize(), (210,210,210))
+            count_s = g.text.render(g.font, f"x{g.inventory[ore]}", (160,160,160))
+            price_s = g.text.render(g.font, f"{self.ore_prices[ore]}c ea", (255,215,0))
+            surf.blit(name_s,  (rx+62, ry+8))
+            surf.blit(count_s, (rx+62, ry+32))
+            surf.blit(price_s, (rx+62, ry+52))
+
+            bw, bh = 76, 28
+            bx2 = rx + col_w - 18 - bw
+            by2 = ry + (row_h - 8 - bh) // 2
+            has = g.inventory[ore] > 0
+            sl = g.text.render(g.font, "Sell All",
+                               (210,255,210) if has else (90,90,90))
+            self._add(make_button(
+                (bx2, by2, bw, bh),
+                (38,110,38) if has else (45,45,45),
+                (70,190,70) if has else (65,65,65), sl,
+                (lambda ore=ore: g.sell_all(ore)) if has else None))
+
+    def _build_upgrades_tab(self, surf, area):
+        g = self.game
+        if "pickaxe" not in g.owned_tools:
+            msg = g.text.render(g.font_large,
+                "Buy a Pickaxe in the Tools tab first.", (160,100,60))
+            surf.blit(msg, (area.x + (area.width-msg.get_width())//2,
+                            area.y + 60))
+            return
+
+        row_h = (area.height - 40) // 3
+        sx, sy = area.x + 24, area.y + 16
+
+        for i, upg_key in enumerate(UPGRADES):
+            upg    = self.upgrade_defs[upg_key]
+            cur_lv = g.pickaxe_upgrades[upg_key]
+            ry     = sy + i * row_h
+
+            row_rect = pygame.Rect(sx, ry, area.width - 48, row_h - 10)
+            draw_rounded_rect(surf, (38, 40, 50), row_rect,
+                              radius=8, border_color=(58,60,74), border_width=1)
+
+            label_s = g.text.render(g.font_large, upg["label"], (220,220,230))
+            desc_s  = g.text.render(g.font, upg["description"], (140,140,155))
+            surf.blit(label_s, (sx+14, ry+10))
+            surf.blit(desc_s,  (sx+14, ry+42))
+
+            for lv in range(1, 4):
+                pip_x = sx + 14 + (lv-1)*36
+                pip_y = ry + 66
+                filled = lv <= cur_lv
+                pygame.draw.circle(surf,
+                                   (255,200,40) if filled else (55,55,65),
+                                   (pip_x+10, pip_y+10), 10)
+                pygame.draw.circle(surf, (90,90,100),
+                                   (pip_x+10, pip_y+10), 10, 2)
+                if upg_key == "unbreaking":
+                    cost_lbl = g.text.render(g.font,
+                        f"-{upg['effects'][lv-1]}/hit",
+                        (255,200,40) if filled else (80,80,90))
+                    surf.blit(cost_lbl, (pip_x + 2, pip_y + 23))
+
+            bw, bh = 130, 36
+            bx2 = sx + area.width - 48 - bw - 14
+            by2 = ry + (row_h - 10 - bh) // 2
+            if cur_lv < 3:
+                cost = upg["costs"][cur_lv]
+                can_buy = g.coins >= cost
+                bl = g.text.render(g.font_med, f"Upgrade  {cost}c",
+                                   (200,255,200) if can_buy else (85,85,85))
+                self._add(make_button(
+                    (bx2, by2, bw, bh),
+                    (35,100,40) if can_buy else (42,42,42),
+                    (70,180,70) if can_buy else (62,62,62), bl,
+                    (lambda k=upg_key: g.buy_upgrade(k)) if can_buy else None))
+            else:
+                maxed = g.text.render(g.font_med, "MAX", (255,200,40))
+                surf.blit(maxed, (bx2+40, by2+6))
+
+    def _build_tools_tab(self, surf, area):
+        g = self.game
+        cols  = 2
+        col_w = (area.width - 40) // cols
+        row_h = (area.height - 30) // 2
+        sx, sy = area.x + 20, area.y + 12
+
+        for i, tool_key in enumerate(SHOP_TOOLS):
+            ci = i % cols
+            ri = i // cols
+            rx = sx + ci * col_w
+            ry = sy + ri * row_h
+            td = self.tool_defs[tool_key]
+
+            card = pygame.Rect(rx, ry, col_w - 12, row_h - 10)
+            draw_rounded_rect(surf, (38, 40, 50), card,
+                              radius=10, border_color=(58,60,74), border_width=1)
+
+            surf.blit(g.tool_imgs[tool_key], (rx+10, ry+10))
+
+            name_s = g.text.render(g.font_large, td["label"], (220,220,230))
+            surf.blit(name_s, (rx+68, ry+10))
+
+            desc_s = g.text.render(g.font, td["description"], (130,130,145))
+            surf.blit(desc_s, (rx+68, ry+42))
+
+            stats = (f"DMG:{td['damage']}  "
+                     f"DUR:{td['base_durability']}  "
+                     f"FORT:x{td['fortune_mult']}")
+            stat_s = g.text.render(g.font, stats, (100,160,200))
+            surf.blit(stat_s, (rx+68, ry+64))
+
+            owned = tool_key in g.owned_tools
+            if tool_key == "dynamite":
+                owned = g.dynamite_count > 0
+
+            bw, bh = 120, 34
+            bx2 = card.right - bw - 10
+            by2 = card.bottom - bh - 10
+
+            if tool_key == "dynamite":
+                can_buy = g.coins >= td["price"]
+                cnt_txt = f"Buy ({td['price']}c)"
+                if g.dynamite_count > 0:
+                    cnt_txt += f"  x{g.dynamite_count}"
+                bl = g.text.render(g.font, cnt_txt,
+                                   (200,255,200) if can_buy else (85,85,85))
+                self._add(make_button(
+                    (bx2, by2, bw, bh),
+                    (35,100,40) if can_buy else (42,42,42),
+                    (70,180,70) if can_buy else (62,62,62), bl,
+                    g.buy_dynamite if can_buy else None))
+
+            elif owned:
+                is_active = g.active_tool == tool_key
+                bl = g.text.render(g.font_med, "Equipped" if is_active else "Equip",
+                                   (160,160,255) if is_active else (160,210,230))
+                self._add(make_button(
+                    (bx2, by2, bw, bh),
+                    (50,50,130) if is_active else (38,80,100),
+                    (100,100,230) if is_active else (60,130,160), bl,
+                    None if is_active else (lambda k=tool_key: g.equip_tool(k))))
+
+                dur = g.owned_tools.get(tool_key, 0)
+                max_dur = td["base_durability"]
+                dur_s = g.text.render(g.font,
+                    f"Durability: {dur}/{max_dur}", (160,160,160))
+                surf.blit(dur_s, (rx+10, by2-2))
+
+            else:
+                can_buy = g.coins >= td["price"]
+                bl = g.text.render(g.font_med, f"Buy  {td['price']}c",
+                                   (200,255,200) if can_buy else (85,85,85))
+                self._add(make_button(
+                    (bx2, by2, bw, bh),
+                    (35,100,40) if can_buy else (42,42,42),
+                    (70,180,70) if can_buy else (62,62,62), bl,
+                    (lambda k=tool_key: g.buy_tool(k)) if can_buy else None))
+
+    def _build_skins_tab(self, surf, area):
+        g = self.game
+        sx, sy = area.x + 30, area.y + 20
+
+        card = pygame.Rect(sx, sy, area.width - 60, 160)
+        draw_rounded_rect(surf, (38, 40, 50), card,
+                          radius=10, border_color=(58, 60, 74), border_width=1)
+
+        if self._preview is None:
+            preview_img = g.player_img_santa if g.player_img_santa else g.player_img_default
+            self._preview = pygame.transform.scale(preview_img, (100, 100))
+        surf.blit(self._preview, (sx + 20, sy + 30))
+
+        name_s  = g.text.render(g.font_large, "Santa Skin", (220, 220, 230))
+        price_s = g.text.render(g.font_med, "10,000 coins", (255, 215, 0))
+        surf.blit(name_s,  (sx + 140, sy + 20))
+        surf.blit(price_s, (sx + 140, sy + 58))
+
+        bw, bh = 140, 38
+        bx2 = card.right - bw - 20
+        by2 = sy + (card.height - bh) // 2
+
+        if "santa" not in g.owned_skins:
+            can_buy = g.coins >= 10000
+            bl = g.text.render(g.font_med, "Buy 10,000c",
+                               (200, 255, 200) if can_buy else (85, 85, 85))
+            self._add(make_button(
+                (bx2, by2, bw, bh),
+                (35, 100, 40) if can_buy else (42, 42, 42),
+                (70, 180, 70) if can_buy else (62, 62, 62), bl,
+                g.buy_skin if can_buy else None))
+        else:
+            is_equipped = g.equipped_skin == "santa"
+            bl = g.text.render(g.font_med, "Unequip" if is_equipped else "Equip",
+                               (160, 160, 255) if is_equipped else (160, 210, 230))
+            self._add(make_button(
+                (bx2, by2, bw, bh),
+                (50, 50, 130) if is_equipped else (38, 80, 100),
+                (100, 100, 230) if is_equipped else (60, 130, 160), bl,
+                g.toggle_skin))
+
+            status_s = g.text.render(g.font,
+                "Equipped" if is_equipped else "Owned",
+                (100, 200, 100) if is_equipped else (160, 160, 160))
+            surf.blit(status_s, (sx + 140, sy + 95))
+
+    # drawing
+
+    def draw(self, target, dt):
+        # returns False when nothing on screen had to change
+        key = self._state_key()
+        if key != self._built_for:
+            self._rebuild()
+            self._built_for = key
+            self.hovered = None
+            self._update_hover()
+            self.dirty = True
+
+        g = self.game
+        flash = g._flash_ttl > 0
+        if not (self.dirty or flash or self._flash_shown):
+            return False
+
+        target.blit(self.frame, (0, 0))
+        if self.hovered:
+            target.blit(self.hovered.hover, self.hovered.rect)
+
+        self._flash_shown = flash
+        if flash:
+            g._flash_ttl -= dt
+            col = (80,220,80) if "Not" not in g._flash_msg else (220,80,80)
+            fs = g.flash_surface(col)
+            target.blit(fs, (self.width // 2 - fs.get_width() // 2,
+                             self.height - 130))
+        self.dirty = False
+        return True
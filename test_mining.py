@@ -0,0 +1,48 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+import main
+from controls import HeldKeys
+from player import movement
+
+ARROWS = {
+    pygame.K_RIGHT: (0, 1),
+    pygame.K_LEFT:  (0, -1),
+    pygame.K_DOWN:  (1, 0),
+    pygame.K_UP:    (-1, 0),
+}
+
+
+@pytest.mark.parametrize("x", [384, 424, 464])
+@pytest.mark.parametrize("key", list(ARROWS))
+def test_drill_bores_along_arrow(x, key):
+    g = main.digging(seed=5, headless=True)
+    bs, sky = main.BLOCK_SIZE, main.SKY_HEIGHT
+    # standing on row 4, so the body is in row 3
+    pos = pygame.math.Vector2(x, sky + 4 * bs - main.PLAYER_HEIGHT)
+    _, _, _, hovered, _ = movement(
+        HeldKeys([key]), pos, 0.0, True, 300, 1,
+        block_size=bs, sky_height=sky,
+        max_x=main.WORLD_RIGHT, min_x=main.WORLD_LEFT)
+    row = (hovered[1] - sky) // bs
+    col = hovered[0] // bs
+
+    # soft blocks all around, so whatever the drill reaches breaks
+    area = [(r, c) for r in range(row - 2, row + 3)
+            for c in range(col - 2, col + 3)
+            if r >= 0 and 0 <= c < g.world.cols]
+    for r, c in area:
+        g.world.set(r, c, "soil")
+    g.owned_tools["drill"] = 50
+    g.active_tool = "drill"
+    g.do_mine(hovered, pos, 0.0, True)
+
+    dr, dc = ARROWS[key]
+    expected = {(row + k * dr, col + k * dc) for k in range(3)} & set(area)
+    broken = {(r, c) for r, c in area if not g.world.solid(r, c)}
+    assert broken == expected
@@ -0,0 +1,26 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import main
+
+
+def test_hits_on_untracked_blocks_leave_the_index_alone():
+    g = main.digging(seed=5, headless=True)
+    world, ores = g.world, g.ores
+    world.set(2, 3, "soil")
+    ores.in_rect(0, 0, 4, world.cols - 1)   # make sure the chunk is indexed
+    version = ores.version
+    world.damage(2, 3, 1)
+    world.set(2, 3, "stone")
+    assert ores.version == version
+
+    world.set(2, 3, "ruby")
+    assert (2, 3, "ruby") in ores.in_rect(2, 3, 2, 3)
+    version = ores.version
+    world.damage(2, 3, 1)
+    assert ores.version == version
+    world.set(2, 3, "air")
+    assert ores.in_rect(2, 3, 2, 3) == []
+    assert ores.version > version
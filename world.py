@@ -0,0 +1,258 @@
+import zlib
+from array import array
+
+# tile id 0 is always air; the rest follow the order of the names passed in
+AIR = 0
+
+
+class BlockView:
+    # thin stand-in for the old Block object, reads straight through to the world
+    __slots__ = ("world", "row", "col", "x", "y")
+
+    def __init__(self, world, row, col):
+        self.world = world
+        self.row, self.col = row, col
+        self.x = col * world.block_size
+        self.y = world.top + row * world.block_size
+
+    @property
+    def tile(self):
+        return self.world.tile(self.row, self.col)
+
+    @property
+    def block_type(self):
+        return self.world.names[self.tile]
+
+    @block_type.setter
+    def block_type(self, name):
+        self.world.set(self.row, self.col, name)
+
+    @property
+    def hp(self):
+        return self.world.hp_at(self.row, self.col)
+
+    @hp.setter
+    def hp(self, value):
+        self.world.set_hp(self.row, self.col, value)
+
+    @property
+    def max_hp(self):
+        return self.world.max_hp[self.tile]
+
+
+class Chunk:
+    __slots__ = ("index", "tiles", "hp", "modified")
+
+    def __init__(self, index, tiles, hp):
+        self.index = index
+        self.tiles = tiles
+        self.hp    = hp
+        # untouched chunks can simply be regenerated from the seed
+        self.modified = False
+
+    def pack(self):
+        return zlib.compress(self.tiles.tobytes() + self.hp.tobytes())
+
+    @classmethod
+    def unpack(cls, index, data, size):
+        raw = zlib.decompress(data)
+        tiles = array("B", raw[:size])
+        hp    = array("H")
+        hp.frombytes(raw[size:])
+        chunk = cls(index, tiles, hp)
+        chunk.modified = True
+        return chunk
+
+
+class World:
+    # Rows start at 0 and go down forever. The world is stored as chunks of
+    # chunk_rows full-width rows; a chunk is generated the first time any
+    # row in it is touched and evicted again once the player is far away.
+
+    def __init__(self, cols, block_hp, block_size, top, generate,
+                 chunk_rows=16, keep_chunks=3):
+        self.cols = cols
+        self.block_size = block_size
+        self.top = top
+        self.chunk_rows = chunk_rows
+        self.chunk_size = cols * chunk_rows
+        self.keep_chunks = keep_chunks
+        # generate(index) -> sequence of chunk_size tile ids
+        self.generate = generate
+
+        self.names = ["air"] + list(block_hp)
+        self.ids   = {name: i for i, name in enumerate(self.names)}
+        self.max_hp = array("H", [1] + [block_hp[n] for n in self.names[1:]])
+        self._fresh_hp = [0] + list(self.max_hp[1:])
+
+        self.chunks  = {}   # index -> resident Chunk
+        self.evicted = {}   # index -> packed bytes of modified chunks
+        self.unsaved = set()   # chunk indices changed since the last save
+        # callbacks(row, col) run after a tile or its hp changes
+        self.watchers = []
+        # callbacks(index, tiles) run when a chunk is generated or restored
+        self.chunk_watchers = []
+        # topmost solid row of every column; generation never produces
+        # air, so it starts at row 0 and only moves when set() runs
+        self.surface = array("l", [0] * cols)
+
+    def chunk(self, index):
+        ch = self.chunks.get(index)
+        if ch is None:
+            data = self.evicted.pop(index, None)
+            if data is not None:
+                ch = Chunk.unpack(index, data, self.chunk_size)
+            else:
+                tiles = array("B", self.generate(index))
+                hp = array("H", map(self._fresh_hp.__getitem__, tiles))
+                ch = Chunk(index, tiles, hp)
+                for fn in self.chunk_watchers:
+                    fn(index, tiles)
+            self.chunks[index] = ch
+        return ch
+
+    def rows_in_view(self, y, height):
+        # rows overlapping the pixel band y .. y + height, clamped to row 0
+        first = max(0, (y - self.top) // self.block_size)
+        last  = (y + height - 1 - self.top) // self.block_size
+        return range(first, last + 1)
+
+    def focus(self, rows):
+        # drop every chunk more than keep_chunks away from the given rows
+        if not rows:
+            return
+        lo = rows[0] // self.chunk_rows - self.keep_chunks
+        hi = rows[-1] // self.chunk_rows + self.keep_chunks
+        for index in [i for i in self.chunks if not lo <= i <= hi]:
+            ch = self.chunks.pop(index)
+            if ch.modified:
+                self.evicted[index] = ch.pack()
+
+    def tile(self, row, col):
+        if row < 0 or not (0 <= col < self.cols):
+            return AIR
+        ch = self.chunks.get(row // self.chunk_rows) or self.chunk(row // self.chunk_rows)
+        return ch.tiles[(row % self.chunk_rows) * self.cols + col]
+
+    def solid(self, row, col):
+        return self.tile(row, col) != AIR
+
+    def hp_at(self, row, col):
+        if row < 0 or not (0 <= col < self.cols):
+            return 0
+        ch = self.chunk(row // self.chunk_rows)
+        return ch.hp[(row % self.chunk_rows) * self.cols + col]
+
+    def set_hp(self, row, col, value):
+        ch = self.chunk(row // self.chunk_rows)
+        ch.hp[(row % self.chunk_rows) * self.cols + col] = max(0, value)
+        ch.modified = True
+        self.unsaved.add(ch.index)
+        self._changed(row, col)
+
+    def set(self, row, col, name):
+        tid = self.ids[name]
+        ch = self.chunk(row // self.chunk_rows)
+        i = (row % self.chunk_rows) * self.cols + col
+        ch.tiles[i] = tid
+        ch.hp[i] = self._fresh_hp[tid]
+        ch.modified = True
+        self.unsaved.add(ch.index)
+        if tid != AIR:
+            if row < self.surface[col]:
+                self.surface[col] = row
+        elif row == self.surface[col]:
+            r = row + 1
+            while self.tile(r, col) == AIR:
+                r += 1
+            self.surface[col] = r
+        self._changed(row, col)
+
+    def damage(self, row, col, amount):
+        ch = self.chunk(row // self.chunk_rows)
+        i = (row % self.chunk_rows) * self.cols + col
+        ch.hp[i] = max(0, ch.hp[i] - amount)
+        ch.modified = True
+        self.unsaved.add(ch.index)
+        self._changed(row, col)
+        return ch.hp[i]
+
+    def damage_area(self, cells, amount):
+        # damage() over many (row, col) cells in one pass: chunk bookkeeping
+        # and surface fixes happen once, not per cell. Cells outside the
+        # world or already air are skipped. Tiles whose hp runs out turn to
+        # air; returns them as (row, col, old tile id).
+        cr, cols = self.chunk_rows, self.cols
+        broken, changed, touched = [], [], {}
+        for row, col in cells:
+            if row < 0 or not (0 <= col < cols):
+                continue
+            index = row // cr
+            ch = touched.get(index) or self.chunk(index)
+            i = (row % cr) * cols + col
+            tid = ch.tiles[i]
+            if tid == AIR:
+                continue
+            touched[index] = ch
+            hp = ch.hp[i] - amount
+            if hp <= 0:
+                ch.tiles[i] = AIR
+                ch.hp[i] = 0
+                broken.append((row, col, tid))
+            else:
+                ch.hp[i] = hp
+            changed.append((row, col))
+        for index, ch in touched.items():
+            ch.modified = True
+            self.unsaved.add(index)
+        for col in {col for row, col, _ in broken if row == self.surface[col]}:
+            r = self.surface[col]
+            while self.tile(r, col) == AIR:
+                r += 1
+            self.surface[col] = r
+        for row, col in changed:
+            self._changed(row, col)
+        return broken
+
+    def modified_chunks(self):
+        return sorted({i for i, ch in self.chunks.items() if ch.modified} |
+                      set(self.evicted))
+
+    def export(self, index):
+        # (tiles, hp) of a chunk that differs from the seed, else None;
+        # evicted chunks are read without making them resident again
+        ch = self.chunks.get(index)
+        if ch is not None:
+            return (ch.tiles, ch.hp) if ch.modified else None
+        data = self.evicted.get(index)
+        if data is None:
+            return None
+        ch = Chunk.unpack(index, data, self.chunk_size)
+        return ch.tiles, ch.hp
+
+    def restore(self, index, tiles, hp):
+        # install saved contents for a chunk; call rebuild_surface() after
+        ch = Chunk(index, array("B", tiles), array("H", hp))
+        ch.modified = True
+        if index in self.chunks:
+            self.chunks[index] = ch
+        else:
+            self.evicted[index] = ch.pack()
+        for fn in self.chunk_watchers:
+            fn(index, ch.tiles)
+
+    def rebuild_surface(self):
+        for col in range(self.cols):
+            r = 0
+            while self.tile(r, col) == AIR:
+                r += 1
+            self.surface[col] = r
+
+    def _changed(self, row, col):
+        for fn in self.watchers:
+            fn(row, col)
+
+    def block(self, row, col):
+        if row >= 0 and 0 <= col < self.cols:
+            return BlockView(self, row, col)
+        return None
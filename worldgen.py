@@ -0,0 +1,54 @@
+import random
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+# resolution of the per-band lookup tables: one random byte picks one tile
+TABLE_SIZE = 256
+
+
+class WorldGen:
+    # Fills whole runs of rows at once. Each depth band gets a 256-entry
+    # table built by bisecting its cumulative weights, so a run of n cells
+    # is just n random bytes pushed through bytes.translate().
+
+    def __init__(self, cols, ids, depth_layers, fossil_pieces, seed,
+                 fossil_rows, fossil_min_row=3, fallback="stone"):
+        self.cols = cols
+        self.seed = seed
+
+        self.bounds = [max_row for max_row, _ in depth_layers]
+        self.tables = []
+        for _, choices in depth_layers:
+            tids = [ids[name] for name, _ in choices]
+            cum  = list(accumulate(w for _, w in choices))
+            step = cum[-1] / TABLE_SIZE
+            self.tables.append(bytes(
+                tids[bisect_right(cum, (b + 0.5) * step)] for b in range(TABLE_SIZE)))
+        self.fallback = bytes([ids[fallback]]) * TABLE_SIZE
+
+        # fossil cells come from the same seed as the terrain
+        rng = random.Random(seed)
+        cells = rng.sample(range(fossil_min_row * cols, fossil_rows * cols),
+                           len(fossil_pieces))
+        self.fossils = {divmod(i, cols): ids[fp]
+                        for i, fp in zip(cells, fossil_pieces)}
+
+    def rows(self, start, count):
+        # runs are seeded by their first row, so the same (seed, start)
+        # always produces the same cells regardless of generation order
+        rng = random.Random(f"{self.seed}:{start}")
+        out = bytearray()
+        row, end = start, start + count
+        while row < end:
+            band = bisect_right(self.bounds, row)
+            if band < len(self.bounds):
+                table, stop = self.tables[band], min(end, self.bounds[band])
+            else:
+                table, stop = self.fallback, end
+            out += rng.randbytes((stop - row) * self.cols).translate(table)
+            row = stop
+        for (r, c), tid in self.fossils.items():
+            if start <= r < end:
+                out[(r - start) * self.cols + c] = tid
+        return array("B", out)